@@ -1,87 +1,491 @@
+import numpy as np
 import pandas as pd
-import openpyxl
-from openpyxl.chart import BarChart, LineChart, Reference, PieChart
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-import matplotlib.pyplot as plt
-import seaborn as sns
-import re
+from pandas.api.types import union_categoricals
+import argparse
 import logging
-from typing import Dict, Any
-from datetime import datetime
-import json
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence
+from itertools import islice
+
+from capture_cache import CaptureCache, capture_key
+from capture_reader import iter_records
+from endpoints import EndpointTable
+from packet_analyzer import TrafficMonitor
+from pcap_reader import is_pcap
+from records import PacketRecord, ingest, iter_capture
+from tcpdump_parser import HEADER_RE, split_endpoint
+
+# openpyxl et matplotlib ne sont chargés qu'à la production du classeur ou des graphiques
+if TYPE_CHECKING:
+    from openpyxl.styles import NamedStyle
+    from charts import Chart
+
+# Même expression que le parser partagé : str.extract et la boucle
+# d'enregistrements découpent les lignes de façon identique
+EXTRACT_PATTERN = '^' + HEADER_RE.pattern
+
+COLUMNS = ['timestamp', 'src_ip', 'src_port', 'dst_ip', 'dst_port', 'flags', 'length', 'protocol']
+# Propre au rejeu des enregistrements : absente des exports CSV et Excel
+EXPORT_COLUMNS = COLUMNS[:-1]
+
+try:
+    # Colonnes Arrow : str.extract s'exécute en C++ (RE2) au lieu d'une boucle Python
+    import pyarrow
+    import pyarrow.compute
+except ImportError:
+    pyarrow = None
+
+MIDNIGHT = pd.Timestamp('1900-01-01')
+
+def _filled(values: pd.Series, default: str) -> pd.Series:
+    # Groupe absent : NaN en mode objet, chaîne vide avec Arrow
+    values = values.fillna(default)
+    return values.where(values != '', default)
+
+def _categorical(values: pd.Series) -> pd.Categorical:
+    # Categories in order of appearance keep value_counts() ties in file order
+    if isinstance(values.dtype, pd.ArrowDtype):
+        encoded = pyarrow.compute.dictionary_encode(pyarrow.array(values.array))
+        return pd.Categorical.from_codes(encoded.indices.to_numpy(zero_copy_only=False),
+                                         categories=pd.Index(encoded.dictionary.to_pylist()))
+    values = values.astype(object)
+    return pd.Categorical(values, categories=pd.unique(values))
+
+def _from_codes(codes: np.ndarray, uniques) -> pd.Categorical:
+    return pd.Categorical.from_codes(codes, categories=pd.Index(uniques))
+
+def _factorized(values: List) -> pd.Categorical:
+    # pd.factorize numérote dans l'ordre d'apparition, comme _categorical
+    codes, uniques = pd.factorize(np.array(values, dtype=object))
+    return _from_codes(codes, uniques)
+
+def _port_label(port: Optional[int]) -> str:
+    return 'unknown' if port is None else str(port)
+
+def _split_endpoints(endpoints: pd.Categorical):
+    # host.port découpé une fois par valeur distincte, pas par ligne
+    split = [split_endpoint(endpoint) for endpoint in endpoints.categories]
+    host_codes, hosts = pd.factorize(np.array([host for host, _ in split], dtype=object))
+    port_codes, ports = pd.factorize(np.array([_port_label(port) for _, port in split], dtype=object))
+    codes = endpoints.codes
+    return _from_codes(host_codes[codes], hosts), _from_codes(port_codes[codes], ports)
+
+def _canonical(hosts: pd.Categorical, endpoints: EndpointTable) -> pd.Categorical:
+    # Un hôte vu sous son nom et sous son adresse n'a plus qu'une catégorie
+    labels = [endpoints.label(endpoints.intern(host)) for host in hosts.categories]
+    label_codes, uniques = pd.factorize(np.array(labels, dtype=object))
+    return _from_codes(label_codes[hosts.codes], uniques)
+
+def _timestamps(values: pd.Series) -> pd.Series:
+    # HH:MM:SS.ffffff découpé par positions : évite strptime ligne par ligne
+    seconds = (values.str.slice(0, 2).astype('int64') * 3600
+               + values.str.slice(3, 5).astype('int64') * 60
+               + values.str.slice(6, 8).astype('int64'))
+    fraction = values.str.slice(9, 15).str.pad(6, side='right', fillchar='0').astype('int64')
+    micros = (seconds * 1_000_000 + fraction).to_numpy(dtype='int64')
+    return pd.Series(MIDNIGHT + pd.to_timedelta(micros, unit='us'), index=values.index)
+
+def extract_frame(lines: List[str]) -> pd.DataFrame:
+    """Extrait toutes les colonnes d'un lot de lignes en un seul str.extract"""
+    if pyarrow is not None:
+        series = pd.Series(pd.arrays.ArrowExtensionArray(pyarrow.array(lines, type=pyarrow.string())))
+    else:
+        series = pd.Series(lines, dtype=object)
+    raw = series.str.extract(EXTRACT_PATTERN)
+    matched = _filled(raw['timestamp'], '') != ''
+    raw, lines = raw[matched], series[matched]
+    # Même classement que parse_line : TCP si la ligne porte des flags, sinon UDP ou IP
+    protocol = np.where(lines.str.contains(r': Flags \[', regex=True).to_numpy(dtype=bool), 'TCP',
+                        np.where(lines.str.contains(' UDP', regex=False).to_numpy(dtype=bool), 'UDP', 'IP'))
+    src_ip, src_port = _split_endpoints(_categorical(raw['src']))
+    dst_ip, dst_port = _split_endpoints(_categorical(raw['dst']))
+    return pd.DataFrame({
+        'timestamp': _timestamps(raw['timestamp']),
+        'src_ip': src_ip,
+        'src_port': src_port,
+        'dst_ip': dst_ip,
+        'dst_port': dst_port,
+        'flags': _categorical(_filled(raw['flags'], '')),
+        'length': _filled(raw['length'], '0').astype('int32'),
+        'protocol': _factorized(list(protocol))
+    }).reset_index(drop=True)
+
+def records_frame(records: List[PacketRecord]) -> pd.DataFrame:
+    """Trame typée d'un lot d'enregistrements, au même format qu'extract_frame"""
+    count = len(records)
+    micros = np.fromiter((r.time for r in records), dtype='int64', count=count)
+    return pd.DataFrame({
+        'timestamp': MIDNIGHT + pd.to_timedelta(micros, unit='us'),
+        'src_ip': _factorized([r.source for r in records]),
+        'src_port': _factorized([_port_label(r.source_port) for r in records]),
+        'dst_ip': _factorized([r.destination for r in records]),
+        'dst_port': _factorized([_port_label(r.dest_port) for r in records]),
+        'flags': _factorized([r.tcp_flags for r in records]),
+        'length': np.fromiter((r.size for r in records), dtype='int32', count=count),
+        'protocol': _factorized([r.protocol for r in records])
+    })
+
+def frame_records(frame: pd.DataFrame) -> Iterator[PacketRecord]:
+    """Enregistrements d'une trame, pour rejouer une capture en cache dans d'autres sinks"""
+    micros = ((frame['timestamp'] - MIDNIGHT) // pd.Timedelta(microseconds=1)).to_numpy()
+    ports = [frame[column].astype(object).to_numpy() for column in ('src_port', 'dst_port')]
+    columns = zip(micros.tolist(), frame['src_ip'].astype(object), ports[0],
+                  frame['dst_ip'].astype(object), ports[1], frame['flags'].astype(object),
+                  frame['length'].tolist(), frame['protocol'].astype(object))
+    for time, source, source_port, destination, dest_port, flags, size, protocol in columns:
+        yield PacketRecord(source=source, destination=destination, tcp_flags=flags, size=size,
+                           time=time, dest_port=None if dest_port == 'unknown' else int(dest_port),
+                           source_port=None if source_port == 'unknown' else int(source_port),
+                           protocol=protocol)
+
+def canonical_hosts(frame: pd.DataFrame, endpoints: EndpointTable) -> pd.DataFrame:
+    """Trame dont src_ip/dst_ip portent la clé canonique de chaque hôte"""
+    return frame.assign(src_ip=_canonical(frame['src_ip'].array, endpoints),
+                        dst_ip=_canonical(frame['dst_ip'].array, endpoints))
+
+def traffic_hours(timestamps: pd.Series) -> pd.Series:
+    """Heure de chaque paquet, que l'horodatage soit typé ou textuel"""
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        return timestamps.dt.hour
+    return pd.to_datetime(timestamps.str[:8], format='%H:%M:%S').dt.hour
+
+def flat_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Mise en forme d'export : horodatage textuel et colonne hour"""
+    flat = frame[EXPORT_COLUMNS].copy()
+    flat['hour'] = traffic_hours(frame['timestamp'])
+    if pd.api.types.is_datetime64_any_dtype(frame['timestamp']):
+        flat['timestamp'] = frame['timestamp'].dt.strftime('%H:%M:%S.%f')
+    return flat
+
+# Limite d'une feuille Excel, ligne d'en-tête comprise
+EXCEL_MAX_ROWS = 1_048_575
+
+def report_styles() -> List['NamedStyle']:
+    """Styles nommés du rapport : enregistrés une fois, partagés par toutes les cellules"""
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+    side = Side(style='thin')
+    border = Border(left=side, right=side, top=side, bottom=side)
+    header = NamedStyle(name='report_header',
+                        fill=PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid"),
+                        font=Font(color="FFFFFF", bold=True),
+                        border=border,
+                        alignment=Alignment(horizontal='center'))
+    cell = NamedStyle(name='report_cell', border=border)
+    return [header, cell]
+
+def column_widths(frame: pd.DataFrame) -> List[int]:
+    """Largeur de chaque colonne, calculée sur la trame juste avant son écriture"""
+    widths = []
+    for column in frame.columns:
+        values = frame[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Seules les catégories présentes comptent, pas chaque ligne
+            values = pd.Series(values.cat.remove_unused_categories().cat.categories)
+        longest = int(values.astype(str).str.len().max()) if len(values) else 0
+        widths.append(max(len(str(column)), longest) + 2)
+    return widths
+
+def write_sheet(ws, frame: pd.DataFrame, cell_style: Optional[str] = None):
+    """Écrit une trame ligne par ligne dans une feuille write_only"""
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    for col, width in enumerate(column_widths(frame), 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    def styled(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    ws.append([styled(header, 'report_header') for header in frame.columns])
+    rows = frame.itertuples(index=False, name=None)
+    if cell_style is None:
+        for row in rows:
+            ws.append(row)
+        return
+    # Style nommé enregistré une fois dans le classeur : chaque cellule n'en porte que le nom
+    for row in rows:
+        ws.append([styled(value, cell_style) for value in row])
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatène des lots en conservant les colonnes catégorielles"""
+    if not frames:
+        return extract_frame([])
+    if len(frames) == 1:
+        return frames[0]
+    columns = {}
+    for column in COLUMNS:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals([f[column] for f in frames])
+        else:
+            columns[column] = pd.concat([f[column] for f in frames], ignore_index=True)
+    return pd.DataFrame(columns)
+
+class TrafficAggregates:
+    """Agrégats fusionnables : paquets/octets par IP source, paquets par port et par heure.
+
+    Chaque lot de paquets produit ses propres agrégats, fusionnés ensuite ;
+    la mémoire dépend du nombre d'IP et de ports distincts, pas du nombre de
+    paquets. L'ordre de première apparition est conservé pour que les
+    égalités soient départagées comme avec value_counts() sur la trame entière.
+    """
+
+    def __init__(self):
+        # Vides plutôt que None : une capture sans paquet IP donne des feuilles vides
+        self.ips = pd.DataFrame({'packets': pd.Series(dtype='int64'),
+                                 'bytes': pd.Series(dtype='int64')}, index=pd.Index([], dtype=object))
+        self.ports = pd.Series(dtype='int64', index=pd.Index([], dtype=object))
+        self.hour_packets = np.zeros(24, dtype='int64')
+        self.hour_bytes = np.zeros(24, dtype='int64')
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'TrafficAggregates':
+        aggregates = cls()
+        if frame.empty:
+            return aggregates
+        lengths = frame['length'].astype('int64')
+        packets = frame['src_ip'].value_counts(sort=False)
+        packets = packets[packets > 0]
+        sizes = lengths.groupby(frame['src_ip'], observed=True, sort=False).sum()
+        ips = pd.DataFrame({'packets': packets, 'bytes': sizes.reindex(packets.index)})
+        ips.index = ips.index.astype(str)
+        ports = frame['dst_port'].value_counts(sort=False)
+        ports = ports[ports > 0]
+        ports.index = ports.index.astype(str)
+        aggregates.ips, aggregates.ports = ips, ports
+
+        hours = traffic_hours(frame['timestamp']).to_numpy()
+        aggregates.hour_packets += np.bincount(hours, minlength=24)
+        aggregates.hour_bytes += np.bincount(hours, weights=lengths.to_numpy(), minlength=24).astype('int64')
+        return aggregates
+
+    def merge(self, other: 'TrafficAggregates'):
+        self.ips = _merge_counts(self.ips, other.ips)
+        self.ports = _merge_counts(self.ports, other.ports)
+        self.hour_packets += other.hour_packets
+        self.hour_bytes += other.hour_bytes
+
+    def __len__(self) -> int:
+        return int(self.hour_packets.sum())
+
+    def src_ip_counts(self) -> pd.Series:
+        return self.ips['packets'].sort_values(ascending=False, kind='stable')
+
+    def dst_port_counts(self) -> pd.Series:
+        return self.ports.sort_values(ascending=False, kind='stable')
+
+    def hourly_traffic(self) -> pd.Series:
+        hours = np.flatnonzero(self.hour_packets)
+        return pd.Series(self.hour_packets[hours], index=hours)
+
+    def ip_stats(self) -> pd.DataFrame:
+        """Contenu de la feuille 'IP Analysis', trié par adresse"""
+        stats = self.ips.sort_index().reset_index()
+        stats.columns = ['IP Address', 'Packet Count', 'Total Bytes']
+        return stats
+
+    def time_stats(self) -> pd.DataFrame:
+        """Contenu de la feuille 'Time Analysis' : une ligne par heure observée"""
+        hours = np.flatnonzero(self.hour_packets)
+        packets = self.hour_packets[hours]
+        total = self.hour_bytes[hours]
+        return pd.DataFrame({
+            'Hour': hours,
+            'Packet Count': packets,
+            'Total Bytes': total,
+            'Average Packet Size': (total / packets).round(2)
+        })
+
+def _merge_counts(current, update):
+    # groupby(sort=False) garde l'ordre de première apparition des clés
+    if current.empty:
+        return update
+    if update.empty:
+        return current
+    return pd.concat([current, update]).groupby(level=0, sort=False).sum()
 
 class NetworkAnalyzer:
-    def __init__(self, input_file: str, suspicious_threshold: int = 1000):
+    def __init__(self, input_file: str, suspicious_threshold: int = 1000,
+                 cache_dir: Optional[str] = '.capture_cache',
+                 endpoints: Optional[EndpointTable] = None):
         self.input_file = input_file
-        self.data = []
+        # Enregistrements en attente de typage, puis lots déjà typés
+        self.batch_size = 50_000
+        self._pending: List[PacketRecord] = []
+        self._frames: List[pd.DataFrame] = []
+        self.frame: Optional[pd.DataFrame] = None
+        self.aggregates: Optional[TrafficAggregates] = None
+        # Aperçu des premières lignes quand la trame entière n'est pas gardée
+        self.preview: Optional[pd.DataFrame] = None
+        # Cache des captures déjà analysées ; None pour le désactiver
+        self.cache = CaptureCache(cache_dir) if cache_dir else None
+        # Table nom/adresse : regroupe les orthographes d'un même hôte à l'analyse
+        self.endpoints = endpoints
         self.suspicious_threshold = suspicious_threshold
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger(__name__)
 
-    def parse_tcpdump(self):
-        pattern = r'''
-            (\d{2}:\d{2}:\d{2}\.\d+)\s+    # Timestamp
-            IP\s+                           # IP marker
-            ([\w\-\.]+?)\.?(\d+)?\s+>\s+   # Source IP and port
-            ([\w\-\.]+?)\.?(\d+)?:?\s*     # Destination IP and port
-            (?:Flags\s+\[(.*?)\])?         # Optional flags
-            (?:\s+length\s+(\d+))?         # Optional packet length
-        '''
+    def parse_tcpdump(self, vectorized: bool = False, batch_size: int = 50_000,
+                      sinks: Sequence = ()):
+        """Lit la capture en une seule passe.
+
+        sinks : autres consommateurs d'enregistrements (un TrafficMonitor par
+        exemple) alimentés par cette même passe. Sur une capture en cache, la
+        trame leur est rejouée enregistrement par enregistrement.
+        """
+        key = None
+        if self.cache is not None and self.cache.enabled:
+            key = capture_key(self.input_file)
+            cached = self.cache.load(key)
+            if cached is not None:
+                self.frame = cached
+                adders = [sink.add_record for sink in sinks]
+                if adders:
+                    for record in frame_records(cached):
+                        for add in adders:
+                            add(record)
+                self.logger.info(f"Loaded {len(cached)} entries from cache")
+                return
+
+        if vectorized and not is_pcap(self.input_file):
+            self.parse_tcpdump_vectorized(batch_size, sinks)
+        else:
+            self.parse_records(batch_size, sinks)
+
+        if key is not None:
+            self.cache.store(key, self.to_frame())
+
+    def parse_records(self, batch_size: int = 50_000, sinks: Sequence = ()):
         try:
-            with open(self.input_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    match = re.search(pattern, line.strip(), re.VERBOSE)
-                    if match:
-                        entry = {
-                            'timestamp': match.group(1),
-                            'src_ip': match.group(2),
-                            'src_port': match.group(3) or 'unknown',
-                            'dst_ip': match.group(4),
-                            'dst_port': match.group(5) or 'unknown',
-                            'flags': match.group(6) or '',
-                            'length': int(match.group(7)) if match.group(7) else 0
-                        }
-                        self.data.append(entry)
-            self.logger.info(f"Successfully parsed {len(self.data)} entries")
+            self.batch_size = batch_size
+            ingest(self.input_file, [self, *sinks])
+            if self._pending:
+                self._frames.append(records_frame(self._pending))
+            self.frame = concat_frames(self._frames)
+            self._pending, self._frames = [], []
+            self.logger.info(f"Successfully parsed {len(self.frame)} entries")
         except Exception as e:
             self.logger.error(f"Error parsing file: {str(e)}")
             raise
 
-    def analyze_traffic(self):
-        if not self.data:
+    def add_record(self, record: PacketRecord):
+        """Sink de records.ingest() : les enregistrements sont typés par lots"""
+        if record.protocol == 'ARP':
+            return
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self._frames.append(records_frame(self._pending))
+            self._pending = []
+
+    def iter_frames(self, batch_size: int = 50_000, sinks: Sequence = ()) -> Iterator[pd.DataFrame]:
+        """Trames successives d'au plus batch_size paquets.
+
+        Chaque lot est aussi rejoué dans les sinks : la capture n'est lue
+        qu'une fois, même quand un TrafficMonitor l'analyse en parallèle.
+        """
+        adders = [sink.add_record for sink in sinks]
+        for frame in self._frames_of_capture(batch_size):
+            if adders:
+                for record in frame_records(frame):
+                    for add in adders:
+                        add(record)
+            yield frame
+
+    def _frames_of_capture(self, batch_size: int) -> Iterator[pd.DataFrame]:
+        if is_pcap(self.input_file):
+            records = (r for r in iter_capture(self.input_file) if r.protocol != 'ARP')
+            while batch := list(islice(records, batch_size)):
+                yield records_frame(batch)
+            return
+        # Lignes d'en-tête regroupées par lots, typées dès l'extraction
+        lines = iter_records(self.input_file)
+        while batch := list(islice(lines, batch_size)):
+            yield extract_frame(batch)
+
+    def parse_tcpdump_vectorized(self, batch_size: int = 50_000, sinks: Sequence = ()):
+        try:
+            self.frame = concat_frames(list(self.iter_frames(batch_size, sinks)))
+            self.logger.info(f"Successfully parsed {len(self.frame)} entries")
+        except Exception as e:
+            self.logger.error(f"Error parsing file: {str(e)}")
+            raise
+
+    def to_frame(self) -> pd.DataFrame:
+        """Trame des paquets analysés, construite une seule fois"""
+        if self.frame is None:
+            self.frame = records_frame([])
+        return self.frame
+
+    def canonical(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Hôtes ramenés à leur clé canonique ; le cache garde les orthographes brutes"""
+        if self.endpoints is None or frame.empty:
+            return frame
+        return canonical_hosts(frame, self.endpoints)
+
+    def analyze_traffic(self, csv_path: Optional[str] = None, render: bool = True):
+        df = self.to_frame()
+        if df.empty:
             return {}
-            
-        df = pd.DataFrame(self.data)
-        src_ip_counts = df['src_ip'].value_counts()
+
+        self.frame = df = self.canonical(df)
+
+        self.aggregates = TrafficAggregates.from_frame(df)
+        # Export CSV optionnel : les rapports lisent directement la trame
+        if csv_path:
+            flat_frame(df).to_csv(csv_path, index=False)
+        return self.report_traffic(render)
+
+    def analyze_traffic_chunked(self, batch_size: int = 50_000, csv_path: Optional[str] = None,
+                                preview_rows: int = 10_000, render: bool = True,
+                                sinks: Sequence = ()):
+        """Analyse hors mémoire : chaque lot est agrégé puis libéré.
+
+        Seuls les agrégats et les preview_rows premières lignes (pour la
+        feuille de données brutes) sont conservés. Les sinks reçoivent les
+        enregistrements de chaque lot, comme avec parse_tcpdump.
+        """
+        aggregates = TrafficAggregates()
+        previews = []
+        kept = 0
+        try:
+            for index, frame in enumerate(self.iter_frames(batch_size, sinks)):
+                frame = self.canonical(frame)
+                aggregates.merge(TrafficAggregates.from_frame(frame))
+                if kept < preview_rows:
+                    previews.append(frame.head(preview_rows - kept))
+                    kept += len(previews[-1])
+                if csv_path:
+                    flat_frame(frame).to_csv(csv_path, index=False, mode='w' if index == 0 else 'a',
+                                             header=index == 0)
+            self.logger.info(f"Successfully aggregated {len(aggregates)} entries")
+        except Exception as e:
+            self.logger.error(f"Error parsing file: {str(e)}")
+            raise
+        if not len(aggregates):
+            return {}
+
+        self.aggregates = aggregates
+        self.preview = concat_frames(previews)
+        return self.report_traffic(render)
+
+    def chart_specs(self, path: str = 'static/traffic_analysis.png') -> List['Chart']:
+        """Graphique trafic horaire / top 10 sources, construit sur les agrégats"""
+        from charts import traffic_overview
+        return [traffic_overview(path, self.aggregates.hour_packets,
+                                 self.aggregates.src_ip_counts().head(10).to_dict())]
+
+    def report_traffic(self, render: bool = True):
+        """Résultats de l'analyse ; render=False laisse le dessin du graphique à l'appelant"""
+        src_ip_counts = self.aggregates.src_ip_counts()
         suspicious_ips = src_ip_counts[src_ip_counts > self.suspicious_threshold]
-        dst_port_counts = df['dst_port'].value_counts()
+        dst_port_counts = self.aggregates.dst_port_counts()
         suspicious_ports = dst_port_counts[dst_port_counts > self.suspicious_threshold]
         
-        df['hour'] = pd.to_datetime(df['timestamp'].str[:8], format='%H:%M:%S').dt.hour
-        hourly_traffic = df['hour'].value_counts().sort_index()
+        hourly_traffic = self.aggregates.hourly_traffic()
         
-        # Création des graphiques
-        plt.figure(figsize=(15, 10))
-        plt.subplot(2, 1, 1)
-        hourly_traffic.plot(kind='line', marker='o')
-        plt.title('Trafic par Heure')
-        plt.xlabel('Heure')
-        plt.ylabel('Nombre de Paquets')
-        
-        plt.subplot(2, 1, 2)
-        src_ip_counts.head(10).plot(kind='bar')
-        plt.title('Top 10 IPs Sources')
-        plt.xlabel('IP Source')
-        plt.ylabel('Nombre de Paquets')
-        plt.xticks(rotation=45)
-        
-        plt.tight_layout()
-        plt.savefig('static/traffic_analysis.png')
-        plt.close()
-
-        # Générer le CSV
-        df.to_csv('network_analysis.csv', index=False)
+        # Graphique redessiné seulement si les agrégats ont changé
+        if render:
+            from charts import render_charts
+            render_charts(self.chart_specs())
         
         return {
             'suspicious_ips': suspicious_ips.to_dict(),
@@ -90,56 +494,35 @@ class NetworkAnalyzer:
             'top_ips': src_ip_counts.head(10).to_dict()
         }
 
-    def create_excel_report(self):
-        # Lire le CSV généré
-        df = pd.read_csv('network_analysis.csv')
-        
-        # Créer le workbook
-        wb = openpyxl.Workbook()
-        
-        # Styles
-        header_fill = PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid")
-        header_font = Font(color="FFFFFF", bold=True)
-        border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                       top=Side(style='thin'), bottom=Side(style='thin'))
+    def create_excel_report(self, path: str = 'network_analysis.xlsx',
+                            max_rows: Optional[int] = None, sample: bool = False):
+        """Classeur en mode write_only : lignes écrites au fil de l'eau, mémoire constante.
+
+        max_rows limite la feuille de données brutes (premières lignes, ou
+        échantillon uniforme si sample=True) ; les feuilles d'analyse portent
+        toujours sur l'ensemble des paquets.
+        """
+        import openpyxl
+        from openpyxl.chart import BarChart, LineChart, Reference
+
+        frame = self.preview if self.preview is not None else self.to_frame()
+        aggregates = self.aggregates if self.aggregates is not None else TrafficAggregates.from_frame(frame)
+        wb = openpyxl.Workbook(write_only=True)
+        for style in report_styles():
+            wb.add_named_style(style)
 
         # 1. Feuille de données brutes
-        ws1 = wb.active
-        ws1.title = 'Raw Data'
-        
-        # Écrire les en-têtes
-        headers = list(df.columns)
-        for col, header in enumerate(headers, 1):
-            cell = ws1.cell(row=1, column=col, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Écrire les données
-        for row_idx, row in enumerate(df.values, 2):
-            for col_idx, value in enumerate(row, 1):
-                cell = ws1.cell(row=row_idx, column=col_idx, value=value)
-                cell.border = border
-                
+        limit = min(max_rows or EXCEL_MAX_ROWS, EXCEL_MAX_ROWS)
+        raw = frame
+        if len(raw) > limit:
+            self.logger.info(f"Raw Data sheet limited to {limit} of {len(raw)} rows")
+            raw = raw.sample(n=limit, random_state=0).sort_index() if sample else raw.head(limit)
+        ws1 = wb.create_sheet('Raw Data')
+        write_sheet(ws1, flat_frame(raw), cell_style='report_cell')
+
         # 2. Feuille d'analyse des IPs
         ws2 = wb.create_sheet('IP Analysis')
-        
-        # En-têtes
-        ws2.cell(row=1, column=1, value='IP Address').fill = header_fill
-        ws2.cell(row=1, column=2, value='Packet Count').fill = header_fill
-        ws2.cell(row=1, column=3, value='Total Bytes').fill = header_fill
-        
-        # Données
-        ip_stats = df.groupby('src_ip').agg({
-            'timestamp': 'count',
-            'length': 'sum'
-        }).reset_index()
-        
-        for idx, row in ip_stats.iterrows():
-            ws2.cell(row=idx+2, column=1, value=row['src_ip'])
-            ws2.cell(row=idx+2, column=2, value=row['timestamp'])
-            ws2.cell(row=idx+2, column=3, value=row['length'])
+        write_sheet(ws2, aggregates.ip_stats())
         
         # Graphique IP Analysis
         chart = BarChart()
@@ -153,23 +536,7 @@ class NetworkAnalyzer:
         
         # 3. Feuille d'analyse temporelle
         ws3 = wb.create_sheet('Time Analysis')
-        
-        df['hour'] = pd.to_datetime(df['timestamp'], format='%H:%M:%S.%f').dt.hour
-        time_stats = df.groupby('hour').agg({
-            'timestamp': 'count',
-            'length': ['sum', 'mean']
-        }).round(2)
-        
-        ws3.cell(row=1, column=1, value='Hour').fill = header_fill
-        ws3.cell(row=1, column=2, value='Packet Count').fill = header_fill
-        ws3.cell(row=1, column=3, value='Total Bytes').fill = header_fill
-        ws3.cell(row=1, column=4, value='Average Packet Size').fill = header_fill
-        
-        for idx, (hour, data) in enumerate(time_stats.iterrows()):
-            ws3.cell(row=idx+2, column=1, value=hour)
-            ws3.cell(row=idx+2, column=2, value=data[('timestamp', 'count')])
-            ws3.cell(row=idx+2, column=3, value=data[('length', 'sum')])
-            ws3.cell(row=idx+2, column=4, value=data[('length', 'mean')])
+        write_sheet(ws3, aggregates.time_stats())
         
         # Graphique temporel
         line = LineChart()
@@ -184,31 +551,83 @@ class NetworkAnalyzer:
         line.set_categories(cats)
         ws3.add_chart(line, "F2")
         
-        # Ajuster les largeurs de colonnes
-        for ws in wb.worksheets:
-            for column_cells in ws.columns:
-                length = max(len(str(cell.value)) for cell in column_cells)
-                ws.column_dimensions[get_column_letter(column_cells[0].column)].width = length + 2
-        
         # Sauvegarder
-        wb.save('network_analysis.xlsx')
-        self.logger.info("Excel report generated: network_analysis.xlsx")
+        wb.save(path)
+        self.logger.info(f"Excel report generated: {path}")
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Analyse d'une capture tcpdump : CSV, classeur Excel, graphiques et rapport de sécurité")
+    parser.add_argument('capture', help="capture tcpdump (texte ou pcap) à analyser")
+    parser.add_argument('--csv', default='network_analysis.csv',
+                        help="export CSV des paquets ('' pour le désactiver)")
+    parser.add_argument('--excel', default='network_analysis.xlsx',
+                        help="classeur Excel ('' pour le désactiver, openpyxl n'est alors pas chargé)")
+    parser.add_argument('--max-rows', type=int, default=None,
+                        help="nombre maximal de lignes de la feuille de données brutes")
+    parser.add_argument('--sample', action='store_true',
+                        help="avec --max-rows : échantillon uniforme plutôt que les premières lignes")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--vectorized', action='store_true',
+                      help="extraction vectorisée (str.extract) de la capture texte")
+    mode.add_argument('--chunked', action='store_true',
+                      help="analyse hors mémoire : seuls les agrégats et un aperçu sont gardés")
+    parser.add_argument('--batch-size', type=int, default=50_000,
+                        help="paquets par lot")
+    parser.add_argument('--no-charts', action='store_true',
+                        help="pas de graphiques PNG (matplotlib n'est alors pas chargé)")
+    parser.add_argument('--static-dir', default='static',
+                        help="dossier du graphique de trafic")
+    parser.add_argument('-o', '--output-dir', default='analysis_output',
+                        help="dossier des graphiques et du rapport de sécurité")
+    parser.add_argument('--threshold', type=int, default=1000,
+                        help="nombre de paquets au-delà duquel une IP ou un port est suspect")
+    parser.add_argument('--hosts', metavar='FICHIER',
+                        help="fichier de type hosts de correspondances adresse/nom")
+    parser.add_argument('--endpoint-cache', default='.endpoint_cache.json',
+                        help="fichier gardant les correspondances nom/adresse d'une exécution à l'autre")
+    return parser.parse_args(argv)
 
-def main():
+def main(argv: Optional[Sequence[str]] = None):
+    args = parse_args(argv)
     try:
-        # Créer le dossier static s'il n'existe pas
         import os
-        if not os.path.exists('static'):
-            os.makedirs('static')
+        if not os.path.isfile(args.capture):
+            raise FileNotFoundError(f"Capture introuvable : {args.capture}")
+        generated = []
             
-        analyzer = NetworkAnalyzer('DumpFile.txt')
-        analyzer.parse_tcpdump()
-        results = analyzer.analyze_traffic()
-        analyzer.create_excel_report()
+        # Correspondances nom/adresse apprises du DNS de la capture, gardées d'une exécution à l'autre
+        endpoints = EndpointTable(args.endpoint_cache)
+        if args.hosts:
+            endpoints.load_hosts(args.hosts)
+        endpoints.learn_from_capture(args.capture)
+        analyzer = NetworkAnalyzer(args.capture, args.threshold, endpoints=endpoints)
+        monitor = TrafficMonitor(endpoints=endpoints)
+        # Une seule lecture de la capture alimente les deux analyses, quel que soit le mode
+        if args.chunked:
+            results = analyzer.analyze_traffic_chunked(args.batch_size, csv_path=args.csv or None,
+                                                       render=False, sinks=[monitor])
+        else:
+            analyzer.parse_tcpdump(vectorized=args.vectorized, batch_size=args.batch_size,
+                                   sinks=[monitor])
+            results = analyzer.analyze_traffic(csv_path=args.csv or None, render=False)
+        if args.csv:
+            generated.append(args.csv)
+        if not args.no_charts and results:
+            from charts import render_charts
+            # Les trois graphiques sont dessinés ensemble, en parallèle
+            traffic_chart = os.path.join(args.static_dir, 'traffic_analysis.png')
+            render_charts(analyzer.chart_specs(traffic_chart) + monitor.chart_specs(args.output_dir))
+            generated.append(traffic_chart)
+        if args.excel:
+            analyzer.create_excel_report(args.excel, args.max_rows, args.sample)
+            generated.append(args.excel)
+        os.makedirs(args.output_dir, exist_ok=True)
+        monitor.save_report(args.output_dir)
+        generated.append(os.path.join(args.output_dir, 'security_report.html'))
+        endpoints.save()
         print("Analyse terminée. Les fichiers suivants ont été générés:")
-        print("- network_analysis.csv")
-        print("- network_analysis.xlsx")
-        print("- static/traffic_analysis.png")
+        for path in generated:
+            print(f"- {path}")
     except Exception as e:
         logging.error(f"Erreur lors de l'analyse: {str(e)}")
         raise
@@ -0,0 +1,70 @@
+import io
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from calendrier import iter_events
+from programme2 import export_pseudo_csv, format_pseudo_csv
+
+
+def replicate(filename: str, target: int, output: str) -> int:
+    """Recopie les VEVENT du fichier (UID suffixés) jusqu'à target événements"""
+    with open(filename, 'rb') as f:
+        content = f.read()
+    start = content.index(b'BEGIN:VEVENT')
+    end = content.rindex(b'END:VEVENT') + len(b'END:VEVENT\n')
+    header, events, footer = content[:start], content[start:end], content[end:]
+    per_copy = events.count(b'BEGIN:VEVENT')
+    copies = -(-target // per_copy)
+    with open(output, 'wb') as f:
+        f.write(header)
+        for copy in range(copies):
+            f.write(events.replace(b'\nUID:', b'\nUID:%d-' % copy))
+        f.write(footer)
+    return copies * per_copy
+
+
+def events_per_second(step, count: int) -> float:
+    start = time.perf_counter()
+    step()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'ADE_RT1_Septembre2023_Decembre2023.ics'
+    target = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        replicated = os.path.join(tmp, 'replicated.ics')
+        count = replicate(filename, target, replicated)
+        events = list(iter_events(replicated))
+
+        def legacy():
+            # Chemin d'origine : un f-string et un print par événement
+            with redirect_stdout(io.StringIO()):
+                for event in events:
+                    print(format_pseudo_csv(event.properties()))
+
+        def bulk():
+            with open(os.path.join(tmp, 'export.csv'), 'w', encoding='utf-8',
+                      newline='', buffering=1 << 20) as f:
+                export_pseudo_csv(events, f)
+
+        def streamed():
+            # Lecture et export en une seule passe, sans liste intermédiaire
+            with open(os.path.join(tmp, 'stream.csv'), 'w', encoding='utf-8',
+                      newline='', buffering=1 << 20) as f:
+                export_pseudo_csv(iter_events(replicated), f)
+
+        print(f"{count:,} événements ({os.path.getsize(replicated) / 1e6:.1f} Mo)")
+        print(f"{'Étape':<28} {'Événements/s':>14}")
+        print(f"{'Analyse (iter_events)':<28} {events_per_second(lambda: list(iter_events(replicated)), count):>14,.0f}")
+        print(f"{'Export par print':<28} {events_per_second(legacy, count):>14,.0f}")
+        print(f"{'Export csv bufferisé':<28} {events_per_second(bulk, count):>14,.0f}")
+        print(f"{'Analyse + export en flux':<28} {events_per_second(streamed, count):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
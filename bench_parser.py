@@ -0,0 +1,60 @@
+import re
+import sys
+import time
+from typing import Callable, List
+
+from tcpdump_parser import parse_header
+
+
+def legacy_parse(line: str):
+    """Parser d'origine de TrafficMonitor.parse_traffic, gardé comme référence"""
+    if not line.strip() or line.startswith('0x'):
+        return None
+
+    patterns = {
+        'time': r'^(\d{2}:\d{2}:\d{2}\.\d{6})',
+        'ip': r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})',
+        'flags': r'Flags \[(.*?)\]',
+        'size': r'length (\d+)',
+        'port': r'\.(\d+)'
+    }
+
+    try:
+        matches = {k: re.search(v, line) for k, v in patterns.items()}
+        ips = re.findall(patterns['ip'], line)
+        ports = re.findall(patterns['port'], line)
+
+        if all([matches['time'], ips, matches['flags'], matches['size']]):
+            return (matches['time'].group(1), ips[0],
+                    ips[1] if len(ips) > 1 else None,
+                    matches['flags'].group(1), int(matches['size'].group(1)),
+                    int(ports[1]) if len(ports) > 1 else None)
+    except (IndexError, AttributeError, ValueError):
+        pass
+    return None
+
+
+def lines_per_second(parser: Callable, lines: List[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            parser(line)
+    elapsed = time.perf_counter() - start
+    return len(lines) * repeat / elapsed
+
+
+def main():
+    files = sys.argv[1:] or ['DumpFile05.txt', 'fichier182.txt']
+    repeat = 200
+
+    print(f"{'File':<20} {'Lines':>7} {'Legacy (l/s)':>14} {'Tokenizer (l/s)':>16} {'Speedup':>8}")
+    for filepath in files:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        legacy = lines_per_second(legacy_parse, lines, repeat)
+        current = lines_per_second(parse_header, lines, repeat)
+        print(f"{filepath:<20} {len(lines):>7} {legacy:>14,.0f} {current:>16,.0f} {current / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Commandes mesurées : import seul, puis l'aide de chaque outil (analyse
+# des arguments comprise, sans lecture de capture)
+COMMANDS = [
+    ('import packet_analyzer', ['-c', 'import packet_analyzer']),
+    ('import analyse', ['-c', 'import analyse']),
+    ('packet_analyzer.py --help', ['packet_analyzer.py', '--help']),
+    ('analyse.py --help', ['analyse.py', '--help']),
+]
+HEAVY = ('matplotlib', 'openpyxl', 'seaborn', 'tkinter', 'pandas', 'numpy')
+IMPORT_RE = re.compile(r'import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)')
+
+
+def wall_time(args: List[str], runs: int) -> float:
+    """Médiane, en millisecondes, de runs lancements d'un interpréteur neuf"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=HERE, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def heavy_imports(args: List[str]) -> List[Tuple[str, float]]:
+    """Dépendances lourdes chargées par la commande et leur coût cumulé (ms), via -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=HERE,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    loaded = {}
+    for match in IMPORT_RE.finditer(result.stderr):
+        name = match.group(2)
+        if name in HEAVY:
+            loaded[name] = int(match.group(1)) / 1000
+    return sorted(loaded.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'Commande':<28} {'Médiane (ms)':>13}  Dépendances lourdes chargées")
+    for label, args in COMMANDS:
+        heavy = ', '.join(f"{name} {cost:.0f} ms" for name, cost in heavy_imports(args)) or '-'
+        print(f"{label:<28} {wall_time(args, runs):>13.0f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,535 @@
+import hashlib
+import json
+import os
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import astuple, dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from file_utils import atomic_write
+
+# Incrémenté à chaque changement du format des événements : les caches périmés sont ignorés
+CACHE_VERSION = 2
+PROPERTIES = ('UID', 'DTSTART', 'DTEND', 'SUMMARY', 'LOCATION', 'DESCRIPTION')
+INDEXES = ('course', 'group', 'modality', 'teacher', 'room', 'date')
+
+# Code de ressource ou de SAE en tête du résumé : R1.07, R1.01c, SAE1.05...
+COURSE_RE = re.compile(r'(?:SAE|R)\d+\.\w+')
+GROUP_PREFIX = 'RT1-'
+PERIODS = ('week', 'month', 'semester')
+RESOURCES = ('room', 'teacher')
+
+try:
+    LOCAL_TZ = ZoneInfo('Europe/Paris')
+except ZoneInfoNotFoundError:
+    # Base tzdata absente : fuseau du système, à décalage fixe
+    LOCAL_TZ = datetime.now().astimezone().tzinfo
+# Groupes des autres promotions (RT2-S3, RT3-TP FI...) : ni groupe RT1 ni enseignant
+PROMOTION_RE = re.compile(r'RT\d-')
+
+
+@dataclass(slots=True)
+class Event:
+    """Séance du calendrier : propriétés ICS et champs dérivés de la description"""
+    uid: str
+    dtstart: str
+    dtend: str
+    summary: str
+    location: str
+    description: str
+    course: str = ''
+    group: str = ''
+    teachers: Tuple[str, ...] = ()
+    modality: str = 'CM'
+    tzid: str = ''  # paramètre TZID de DTSTART, vide pour une heure UTC ou flottante
+
+    @property
+    def rooms(self) -> List[str]:
+        # Plusieurs salles sont séparées par des virgules
+        return [room.strip() for room in self.location.split(',') if room.strip()]
+
+    @property
+    def prof(self) -> str:
+        return self.teachers[-1] if self.teachers else 'vide'
+
+    @property
+    def start(self) -> Optional[datetime]:
+        """Début en heure locale"""
+        return ics_datetime(self.dtstart, self.tzid)
+
+    @property
+    def end(self) -> Optional[datetime]:
+        # DTEND est supposé dans le même fuseau que DTSTART
+        return ics_datetime(self.dtend, self.tzid)
+
+    @property
+    def duration(self) -> timedelta:
+        return duration_between(self.start, self.end)
+
+    @property
+    def day(self) -> Optional[date]:
+        start = self.start
+        return start.date() if start is not None else None
+
+    def properties(self) -> Dict[str, str]:
+        """Propriétés ICS sous les noms et la forme échappée du fichier"""
+        return dict(zip(PROPERTIES, map(escape, (self.uid, self.dtstart, self.dtend, self.summary,
+                                                 self.location, self.description))))
+
+
+def ics_datetime(value: str, tzid: str = '') -> Optional[datetime]:
+    """Date ICS convertie en datetime à l'heure locale (None si illisible).
+
+    20231026T120000Z est en UTC, une valeur avec TZID dans ce fuseau, une
+    valeur flottante ou une date seule (VALUE=DATE) à l'heure locale.
+    """
+    try:
+        if len(value) == 8:
+            return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]), tzinfo=LOCAL_TZ)
+        moment = datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                          int(value[9:11]), int(value[11:13]), int(value[13:15] or 0))
+    except (IndexError, ValueError):
+        return None
+    if value.endswith('Z'):
+        zone = timezone.utc
+    elif tzid:
+        try:
+            zone = ZoneInfo(tzid)
+        except (ZoneInfoNotFoundError, ValueError):
+            zone = LOCAL_TZ
+    else:
+        zone = LOCAL_TZ
+    return moment.replace(tzinfo=zone).astimezone(LOCAL_TZ)
+
+
+def duration_between(start: Optional[datetime], end: Optional[datetime]) -> timedelta:
+    """Durée réelle entre deux instants, nulle si l'un manque ou si la fin précède le début"""
+    if start is None or end is None:
+        return timedelta(0)
+    # Dans un même fuseau, Python soustrait les heures murales : le passage
+    # à l'heure d'hiver serait compté en trop, d'où le calcul en UTC
+    duration = end.astimezone(timezone.utc) - start.astimezone(timezone.utc)
+    return max(duration, timedelta(0))
+
+
+def format_duration(duration: timedelta) -> str:
+    minutes = int(duration.total_seconds()) // 60
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_ics_datetime(value: str) -> Tuple[str, str]:
+    """Date et heure locales lisibles d'une date ICS : ('26-10-2023', '14:00').
+
+    Chaîne vide ou illisible : valeurs par défaut des programmes ('01-01-2024', '00:00').
+    """
+    moment = ics_datetime(value) if value else None
+    if moment is None:
+        return "01-01-2024", "00:00"
+    return moment.strftime('%d-%m-%Y'), moment.strftime('%H:%M')
+
+
+def calculate_duration(dtstart: str, dtend: str) -> str:
+    """Durée HH:MM entre deux dates ICS.
+
+    Calculée sur les instants réels : une séance à cheval sur minuit ou sur
+    un changement d'heure garde sa vraie durée.
+    """
+    return format_duration(duration_between(ics_datetime(dtstart), ics_datetime(dtend)))
+
+
+def period_key(moment: datetime, period: str) -> str:
+    """Clé triable d'une période : 2023-W44, 2023-10 ou 2023-2024 S1"""
+    if period == 'week':
+        year, week, _ = moment.isocalendar()
+        return f"{year}-W{week:02d}"
+    if period == 'month':
+        return f"{moment.year}-{moment.month:02d}"
+    if period == 'semester':
+        # Année universitaire : S1 de septembre à janvier, S2 de février à août
+        year = moment.year if moment.month >= 9 else moment.year - 1
+        semester = 1 if moment.month >= 9 or moment.month == 1 else 2
+        return f"{year}-{year + 1} S{semester}"
+    raise ValueError(f"Période inconnue : {period}")
+
+
+MONTH_NAMES = ['Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin', 'Juillet',
+               'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
+
+
+def month_span(first: date, last: date) -> List[Tuple[int, int]]:
+    """(année, mois) de chaque mois de first à last inclus, même sans séance"""
+    months = []
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def month_label(year: int, month: int) -> str:
+    """Libellé d'un mois : 'Octobre 2023'"""
+    return f"{MONTH_NAMES[month - 1]} {year}"
+
+
+def _instant(value: Union[date, datetime]) -> float:
+    # Une date seule désigne minuit, heure locale
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time(), tzinfo=LOCAL_TZ)
+    elif value.tzinfo is None:
+        value = value.replace(tzinfo=LOCAL_TZ)
+    return value.timestamp()
+
+
+class IntervalIndex:
+    """Intervalles [début, fin) triés par début, interrogés par chevauchement.
+
+    Aucune séance ne dure plus que la plus longue d'entre elles : celles qui
+    chevauchent [a, b) commencent donc entre a - plus_longue et b. Deux
+    bisections bornent ces candidates, soit O(log n + k) pour des durées
+    bornées comme celles d'un emploi du temps.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, int]]):
+        intervals = sorted(intervals)
+        self.starts = [start for start, _, _ in intervals]
+        self.ends = [end for _, end, _ in intervals]
+        self.positions = [position for _, _, position in intervals]
+        self.longest = max((end - start for start, end, _ in intervals), default=0)
+
+    def overlapping(self, start: float, end: float) -> List[int]:
+        """Positions des intervalles qui chevauchent [start, end), par début croissant"""
+        low = bisect_right(self.starts, start - self.longest)
+        high = bisect_left(self.starts, end)
+        ends, positions = self.ends, self.positions
+        return [positions[i] for i in range(low, high) if ends[i] > start]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+def unfold(lines: Iterable[bytes]) -> Iterator[str]:
+    """Lignes logiques d'un flux ICS (RFC 5545, 3.1).
+
+    Une ligne commençant par une espace ou une tabulation continue la
+    précédente. Le dépliage se fait sur les octets, avant décodage : un
+    repli peut couper un caractère UTF-8 en deux.
+    """
+    pending = None
+    for line in lines:
+        line = line.rstrip(b'\r\n')
+        if line[:1] in (b' ', b'\t'):
+            if pending is not None:
+                pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending.decode('utf-8', errors='replace')
+        pending = line
+    if pending is not None:
+        yield pending.decode('utf-8', errors='replace')
+
+
+def parse_content_line(line: str) -> Tuple[str, Dict[str, str], str]:
+    """Découpe NOM;PARAM=valeur;...:VALEUR ; les deux-points entre guillemets ne comptent pas"""
+    index = line.find(':')
+    if index < 0:
+        return '', {}, ''
+    if '"' in line[:index]:
+        # Paramètre entre guillemets avant le premier deux-points : parcours caractère par caractère
+        quoted = False
+        for index, char in enumerate(line):
+            if char == '"':
+                quoted = not quoted
+            elif char == ':' and not quoted:
+                break
+        else:
+            return '', {}, ''
+    head = line[:index]
+    if ';' not in head:
+        return head.upper(), {}, line[index + 1:]
+    name, *params = head.split(';')
+    parameters = {}
+    for param in params:
+        key, _, value = param.partition('=')
+        parameters[key.upper()] = value.strip('"')
+    return name.upper(), parameters, line[index + 1:]
+
+
+ESCAPES = {'n': '\n', 'N': '\n', ',': ',', ';': ';', '\\': '\\'}
+ESCAPE_RE = re.compile(r'\\(.)')
+
+
+def unescape(value: str) -> str:
+    """Valeur TEXT déséchappée : \\n, \\, \\; et \\\\"""
+    if '\\' not in value:
+        return value
+    return ESCAPE_RE.sub(lambda match: ESCAPES.get(match.group(1), match.group(0)), value)
+
+
+def escape(value: str) -> str:
+    return (value.replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def make_event(properties: Dict[str, str], tzid: str = '') -> Event:
+    """Construit une séance (valeurs déséchappées) et dérive cours, groupe, enseignants et modalité"""
+    description = properties.get('DESCRIPTION', '')
+    summary = properties.get('SUMMARY', '')
+
+    modality = 'CM'
+    if 'TD' in description:
+        modality = 'TD'
+    elif 'TP' in description:
+        modality = 'TP'
+
+    group = ''
+    teachers = []
+    for part in description.split('\n'):
+        part = part.strip()
+        if not part or part.startswith('('):
+            continue
+        if GROUP_PREFIX in part:
+            group = part
+        elif not PROMOTION_RE.match(part):
+            teachers.append(part)
+
+    course = COURSE_RE.match(summary)
+    return Event(
+        uid=properties.get('UID', ''),
+        dtstart=properties.get('DTSTART', ''),
+        dtend=properties.get('DTEND', ''),
+        summary=summary,
+        location=properties.get('LOCATION', ''),
+        description=description,
+        course=course.group() if course else '',
+        group=group,
+        teachers=tuple(teachers),
+        modality=modality,
+        tzid=tzid
+    )
+
+
+def iter_events(filename: str) -> Iterator[Event]:
+    """Séances du fichier, produites une à une en une seule passe.
+
+    Les lignes sont dépliées, les paramètres lus et les valeurs
+    déséchappées au fil de la lecture ; seul l'événement en cours est en
+    mémoire, un export de plusieurs années peut donc être filtré à la volée.
+    Les composants imbriqués (VALARM...) sont ignorés.
+    """
+    current_event = None
+    tzid = ''
+    depth = 0
+    with open(filename, 'rb') as file:
+        for line in unfold(file):
+            name, parameters, value = parse_content_line(line)
+            if name == 'BEGIN':
+                if value.upper() == 'VEVENT':
+                    current_event, tzid, depth = {}, '', 0
+                elif current_event is not None:
+                    depth += 1
+            elif name == 'END':
+                if current_event is not None and depth:
+                    depth -= 1
+                elif value.upper() == 'VEVENT' and current_event is not None:
+                    if current_event:
+                        yield make_event(current_event, tzid)
+                    current_event = None
+            elif current_event is not None and not depth and name in PROPERTIES:
+                current_event[name] = unescape(value)
+                if name == 'DTSTART':
+                    tzid = parameters.get('TZID', '')
+
+
+def group_keys(group: str) -> List[str]:
+    """Clés d'index d'un groupe : RT1-TP A1, TP A1 et A1"""
+    if not group:
+        return []
+    short = group[len(GROUP_PREFIX):] if group.startswith(GROUP_PREFIX) else group
+    return list(dict.fromkeys([group, short, short.split()[-1]]))
+
+
+class EventStore:
+    """Séances d'un calendrier indexées par cours, groupe, modalité, enseignant, salle et date.
+
+    Chaque index associe une valeur aux positions (croissantes) des séances ;
+    une requête intersecte les listes concernées en partant de la plus courte,
+    sans reparcourir les séances.
+    """
+
+    def __init__(self, events: List[Event]):
+        self.events = events
+        self.indexes: Dict[str, Dict] = {name: defaultdict(list) for name in INDEXES}
+        # Début et fin de chaque séance (horodatages POSIX), None si illisibles
+        self.spans: List[Optional[Tuple[float, float]]] = []
+        for position, event in enumerate(events):
+            start, end = event.start, event.end
+            self.spans.append((start.timestamp(), max(end.timestamp(), start.timestamp()))
+                              if start is not None and end is not None else None)
+            for name, key in self._keys(event, start):
+                self.indexes[name][key].append(position)
+        self.timeline = self._interval_index(range(len(events)))
+        self._resource_timelines: Dict[Tuple[str, str], IntervalIndex] = {}
+
+    def _interval_index(self, positions: Iterable[int]) -> IntervalIndex:
+        spans = self.spans
+        return IntervalIndex((*spans[position], position) for position in positions
+                             if spans[position] is not None)
+
+    @staticmethod
+    def _keys(event: Event, start: Optional[datetime]) -> Iterator[Tuple[str, object]]:
+        if event.course:
+            yield 'course', event.course
+        for key in group_keys(event.group):
+            yield 'group', key
+        yield 'modality', event.modality
+        for teacher in dict.fromkeys(event.teachers):
+            yield 'teacher', teacher
+        for room in dict.fromkeys(event.rooms):
+            yield 'room', room
+        if start is not None:
+            yield 'date', start.date()
+
+    def _positions(self, criteria: Dict) -> Optional[set]:
+        # None : aucun critère, toutes les séances conviennent
+        lists = []
+        for name, value in criteria.items():
+            if name not in self.indexes:
+                raise ValueError(f"Index inconnu : {name}")
+            if value is not None:
+                lists.append(self.indexes[name].get(value, []))
+        if not lists:
+            return None
+        lists.sort(key=len)
+        positions = set(lists[0])
+        for other in lists[1:]:
+            positions.intersection_update(other)
+        return positions
+
+    def select(self, **criteria) -> List[Event]:
+        """Séances satisfaisant tous les critères, dans l'ordre du fichier.
+
+        Exemple : store.select(course='R1.07', group='A1', modality='TP').
+        Un critère à None est ignoré.
+        """
+        positions = self._positions(criteria)
+        if positions is None:
+            return list(self.events)
+        return [self.events[position] for position in sorted(positions)]
+
+    def between(self, start: Union[date, datetime, None] = None,
+                end: Union[date, datetime, None] = None, **criteria) -> List[Event]:
+        """Séances qui chevauchent [start, end) et satisfont les critères, par ordre chronologique.
+
+        Exemple : store.between(date(2023, 10, 1), date(2023, 11, 1), course='R1.07', group='A1').
+        Une date seule désigne minuit ; une borne absente est ouverte.
+        """
+        low = _instant(start) if start is not None else float('-inf')
+        high = _instant(end) if end is not None else float('inf')
+        positions = self._positions(criteria)
+        return [self.events[position] for position in self.timeline.overlapping(low, high)
+                if positions is None or position in positions]
+
+    def by_period(self, period: str = 'month', events: Optional[Iterable[Event]] = None,
+                  **criteria) -> Dict[str, List[Event]]:
+        """Séances regroupées par semaine, mois ou semestre, périodes dans l'ordre chronologique"""
+        if period not in PERIODS:
+            raise ValueError(f"Période inconnue : {period}")
+        if events is None:
+            events = self.between(**criteria)
+        groups: Dict[str, List[Event]] = defaultdict(list)
+        for event in events:
+            start = event.start
+            if start is not None:
+                groups[period_key(start, period)].append(event)
+        return dict(sorted(groups.items()))
+
+    def _resource_timeline(self, resource: str, key: str) -> IntervalIndex:
+        timeline = self._resource_timelines.get((resource, key))
+        if timeline is None:
+            timeline = self._interval_index(self.indexes[resource].get(key, []))
+            self._resource_timelines[resource, key] = timeline
+        return timeline
+
+    def conflicts_with(self, event: Event, resource: str = 'room') -> List[Event]:
+        """Autres séances qui partagent une salle (ou un enseignant) de event sur le même créneau"""
+        if resource not in RESOURCES:
+            raise ValueError(f"Ressource inconnue : {resource}")
+        start, end = event.start, event.end
+        if start is None or end is None:
+            return []
+        keys = event.rooms if resource == 'room' else event.teachers
+        found = {}
+        for key in dict.fromkeys(keys):
+            for position in self._resource_timeline(resource, key).overlapping(start.timestamp(),
+                                                                               end.timestamp()):
+                other = self.events[position]
+                if other is not event:
+                    found[position] = other
+        return [found[position] for position in sorted(found, key=lambda p: self.spans[p])]
+
+    def conflicts(self, resource: str = 'room') -> List[Tuple[str, Event, Event]]:
+        """Paires de séances qui se chevauchent dans une même salle (ou pour un même enseignant).
+
+        Balayage des séances de chaque ressource par début croissant : seules
+        les séances encore en cours sont comparées, O(n log n + k).
+        """
+        if resource not in RESOURCES:
+            raise ValueError(f"Ressource inconnue : {resource}")
+        pairs = []
+        for key in sorted(self.indexes[resource]):
+            timeline = self._resource_timeline(resource, key)
+            active: List[int] = []
+            for start, end, position in zip(timeline.starts, timeline.ends, timeline.positions):
+                active = [other for other in active if self.spans[other][1] > start]
+                for other in active:
+                    pairs.append((key, self.events[other], self.events[position]))
+                active.append(position)
+        return pairs
+
+    def keys(self, name: str) -> List:
+        """Valeurs distinctes d'un index, triées"""
+        return sorted(self.indexes[name])
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self.events)
+
+
+def parse_calendar(filename: str) -> EventStore:
+    return EventStore(list(iter_events(filename)))
+
+
+def cache_path(filename: str, cache_dir: str) -> str:
+    digest = hashlib.blake2b(os.path.abspath(filename).encode('utf-8'), digest_size=16)
+    return os.path.join(cache_dir, f"{digest.hexdigest()}.json")
+
+
+def load_calendar(filename: str, cache_dir: Optional[str] = '.calendar_cache') -> EventStore:
+    """Calendrier lu une seule fois, puis relu depuis le cache tant que le fichier ne change pas.
+
+    Le cache est invalidé par la date de modification et la taille du
+    fichier ; cache_dir=None le désactive.
+    """
+    if cache_dir is None:
+        return parse_calendar(filename)
+    stat = os.stat(filename)
+    identity = [CACHE_VERSION, stat.st_mtime_ns, stat.st_size]
+    path = cache_path(filename, cache_dir)
+    try:
+        with open(path, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['identity'] == identity:
+            return EventStore([Event(*row[:8], tuple(row[8]), *row[9:]) for row in cached['events']])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    store = parse_calendar(filename)
+    os.makedirs(cache_dir, exist_ok=True)
+    atomic_write(path, json.dumps({'identity': identity, 'events': [astuple(event) for event in store]},
+                                  ensure_ascii=False))
+    return store
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+from typing import Optional
+
+import pandas as pd
+
+from file_utils import atomic_write
+
+try:
+    import pyarrow
+    import pyarrow.feather
+except ImportError:
+    pyarrow = None
+
+# Bumped whenever the parsed frame layout changes so stale entries are ignored
+CACHE_VERSION = 3
+CHUNK_SIZE = 1 << 20
+
+
+def content_hash(filepath: str) -> str:
+    """BLAKE2 digest of a file, read in fixed-size chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def capture_key(filepath: str, parser: str = '') -> str:
+    """Cache key of a capture: path, size, mtime and content hash"""
+    stat = os.stat(filepath)
+    identity = json.dumps([CACHE_VERSION, parser, os.path.abspath(filepath),
+                           stat.st_size, stat.st_mtime_ns, content_hash(filepath)])
+    return hashlib.blake2b(identity.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CaptureCache:
+    """Parsed captures stored as Feather files, one per capture key.
+
+    Feather keeps the column dtypes (categoricals, datetimes, int32) so a
+    cached frame is usable as is. Without pyarrow the cache is disabled and
+    every lookup misses.
+    """
+
+    def __init__(self, directory: str = '.capture_cache'):
+        self.directory = directory
+
+    @property
+    def enabled(self) -> bool:
+        return pyarrow is not None
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.feather")
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        if not self.enabled:
+            return None
+        try:
+            return pyarrow.feather.read_table(self.path(key)).to_pandas()
+        except (FileNotFoundError, pyarrow.ArrowInvalid):
+            return None
+
+    def store(self, key: str, frame: pd.DataFrame):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        sink = pyarrow.BufferOutputStream()
+        table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+        pyarrow.feather.write_feather(table, sink, compression='lz4')
+        atomic_write(self.path(key), sink.getvalue().to_pybytes())
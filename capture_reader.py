@@ -0,0 +1,105 @@
+import mmap
+import os
+import re
+import time
+from typing import Iterator, Optional
+
+# A record starts at a line beginning with a tcpdump timestamp; the indented
+# hex-dump lines that follow it are skipped by the scan without being decoded.
+HEADER_LINE_RE = re.compile(rb'^\d\d:\d\d:\d\d\.\d+ [^\r\n]*', re.MULTILINE)
+
+
+class CaptureReader:
+    """Memory-mapped reader over a tcpdump text capture"""
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._file = None
+        self._map = None
+
+    def __enter__(self) -> 'CaptureReader':
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self):
+        self._file = open(self.filepath, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def records(self, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+        """Yield the decoded header line of every record in [start, end)"""
+        if self._map is None:
+            return
+        end = len(self._map) if end is None else end
+        for match in HEADER_LINE_RE.finditer(self._map, start, end):
+            yield match.group().decode('utf-8')
+
+    def scan(self, pattern: 're.Pattern[bytes]') -> Iterator['re.Match[bytes]']:
+        """Run a bytes pattern over the whole map, without decoding any line"""
+        if self._map is None:
+            return
+        yield from pattern.finditer(self._map)
+
+
+def iter_records(filepath: str, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """Iterate over the header lines of a capture file"""
+    with CaptureReader(filepath) as reader:
+        yield from reader.records(start, end)
+
+
+def follow_records(filepath: str, poll_interval: float = 0.5,
+                   from_start: bool = False) -> Iterator[Optional[str]]:
+    """Tail a growing capture, yielding header lines as they are written.
+
+    Yields None whenever no complete line is available so callers can run
+    periodic work. Rotation (new inode) and truncation are detected and the
+    new file is read from its beginning.
+    """
+    f = None
+    inode = None
+    partial = b''
+    while True:
+        if f is None:
+            try:
+                f = open(filepath, 'rb')
+            except FileNotFoundError:
+                yield None
+                time.sleep(poll_interval)
+                continue
+            inode = os.fstat(f.fileno()).st_ino
+            if not from_start:
+                f.seek(0, os.SEEK_END)
+            # Anything after the first open is a rotated file: read it whole
+            from_start = True
+            partial = b''
+
+        line = f.readline()
+        if line.endswith(b'\n'):
+            line, partial = partial + line, b''
+            if match := HEADER_LINE_RE.match(line):
+                yield match.group().decode('utf-8')
+            continue
+        partial += line
+
+        try:
+            stat = os.stat(filepath)
+            rotated = stat.st_ino != inode or stat.st_size < f.tell()
+        except FileNotFoundError:
+            rotated = False
+        if rotated:
+            f.close()
+            f = None
+            continue
+        yield None
+        time.sleep(poll_interval)
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from file_utils import atomic_write
+
+# Bumped whenever a renderer's look changes so every chart is redrawn
+RENDER_VERSION = 1
+MANIFEST = '.chart_manifest.json'
+
+BACKGROUND = '#1a237e'
+FLAG_COLORS = ['#ff4081', '#ffd700', '#18ffff', '#69f0ae', '#b388ff']
+
+
+@dataclass
+class Chart:
+    """A figure to draw: renderer name, target PNG and the aggregate it plots.
+
+    data holds plain lists and numbers only, so a chart pickles cheaply to
+    a worker and hashes to the same digest from one run to the next.
+    """
+    kind: str
+    path: str
+    data: Dict
+
+    def digest(self) -> str:
+        content = json.dumps([RENDER_VERSION, self.kind, self.data], sort_keys=True)
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def size_histogram(path: str, edges: Sequence[int], counts: Sequence[int], maximum: int,
+                   bins: int = 40) -> Chart:
+    """Packet size chart, re-binned from the fixed-width bins of a sketches.Histogram"""
+    binned, bin_edges = np.histogram(edges, bins=bins, range=(0, maximum or 1), weights=counts)
+    return Chart('size_histogram', path, {
+        'counts': binned.astype('int64').tolist(),
+        'edges': bin_edges.tolist(),
+    })
+
+
+def flag_pie(path: str, flags: Dict[str, int]) -> Chart:
+    return Chart('flag_pie', path, {'labels': list(flags), 'counts': list(flags.values())})
+
+
+def traffic_overview(path: str, hour_packets: np.ndarray, top_ips: Dict[str, int]) -> Chart:
+    """Packets per active hour (from the 24 hour bincount) above the top sources"""
+    hours = np.flatnonzero(hour_packets)
+    return Chart('traffic_overview', path, {
+        'hours': hours.tolist(),
+        'packets': np.asarray(hour_packets)[hours].tolist(),
+        'top_labels': [str(ip) for ip in top_ips],
+        'top_counts': [int(count) for count in top_ips.values()],
+    })
+
+
+def _figure(figsize):
+    # Agg canvas and Figure objects only: no pyplot state, no GUI backend
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _draw_size_histogram(data: Dict, path: str):
+    figure = _figure((12, 6))
+    axes = figure.add_subplot()
+    axes.stairs(data['counts'], data['edges'], fill=True, color='#4a148c',
+                edgecolor='#e1bee7', alpha=0.8)
+    axes.set_title('Packet Size Distribution')
+    axes.set_xlabel('Size (bytes)')
+    axes.set_ylabel('Frequency')
+    axes.grid(True, alpha=0.3)
+    figure.savefig(path, facecolor=BACKGROUND, edgecolor='none')
+
+
+def _draw_flag_pie(data: Dict, path: str):
+    figure = _figure((10, 10))
+    axes = figure.add_subplot()
+    axes.pie(data['counts'], labels=data['labels'], autopct='%1.1f%%', colors=FLAG_COLORS)
+    axes.set_title('TCP Flag Distribution', color='white')
+    axes.axis('equal')
+    figure.savefig(path, facecolor=BACKGROUND, edgecolor='none')
+
+
+def _draw_traffic_overview(data: Dict, path: str):
+    figure = _figure((15, 10))
+    hourly, top = figure.subplots(2, 1)
+    hourly.plot(data['hours'], data['packets'], marker='o')
+    hourly.set_title('Trafic par Heure')
+    hourly.set_xlabel('Heure')
+    hourly.set_ylabel('Nombre de Paquets')
+
+    top.bar(data['top_labels'], data['top_counts'])
+    top.set_title('Top 10 IPs Sources')
+    top.set_xlabel('IP Source')
+    top.set_ylabel('Nombre de Paquets')
+    top.tick_params(axis='x', labelrotation=45)
+
+    figure.tight_layout()
+    figure.savefig(path)
+
+
+RENDERERS = {
+    'size_histogram': _draw_size_histogram,
+    'flag_pie': _draw_flag_pie,
+    'traffic_overview': _draw_traffic_overview,
+}
+
+
+def render(chart: Chart) -> str:
+    """Draw one chart; runs in a worker process"""
+    RENDERERS[chart.kind](chart.data, chart.path)
+    return chart.path
+
+
+def _load_manifest(directory: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(directory: str, manifest: Dict[str, str]):
+    atomic_write(os.path.join(directory, MANIFEST), json.dumps(manifest, indent=1))
+
+
+def render_charts(charts: List[Chart], workers: Optional[int] = None, force: bool = False) -> int:
+    """Draw the charts whose aggregate changed since the last run; returns how many were drawn.
+
+    Each output directory keeps the digest of the data behind every PNG it
+    holds. Stale charts are drawn in parallel worker processes, or inline
+    when that would mean a single worker (one stale chart, one CPU or
+    workers=1): a pool then only adds process start-up.
+    """
+    manifests: Dict[str, Dict[str, str]] = {}
+    stale = []
+    for chart in charts:
+        directory = os.path.dirname(chart.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        manifest = manifests.get(directory)
+        if manifest is None:
+            manifest = manifests[directory] = _load_manifest(directory)
+        name = os.path.basename(chart.path)
+        if force or manifest.get(name) != chart.digest() or not os.path.exists(chart.path):
+            stale.append(chart)
+
+    workers = min(len(stale), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(render, stale))
+    else:
+        for chart in stale:
+            render(chart)
+
+    for chart in stale:
+        directory = os.path.dirname(chart.path) or '.'
+        manifests[directory][os.path.basename(chart.path)] = chart.digest()
+    for directory in {os.path.dirname(chart.path) or '.' for chart in stale}:
+        _save_manifest(directory, manifests[directory])
+    return len(stale)
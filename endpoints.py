@@ -0,0 +1,217 @@
+import ipaddress
+import json
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from capture_reader import CaptureReader
+from file_utils import atomic_write
+from pcap_reader import is_pcap
+
+CACHE_VERSION = 1
+
+# tcpdump's one-line DNS summaries, e.g.
+#   BP-Linux8.53220 > ns1.lan.rt.domain: 54801+ A? lacampora.org. (31)
+#   ns1.lan.rt.domain > BP-Linux8.53220: 54801 1/0/0 A 184.107.43.74 (47)
+# Queries and answers are paired by (client endpoint, query id).
+DNS_RE = re.compile(
+    rb'^\d\d:\d\d:\d\d\.\d+ IP6? '
+    rb'(?:(?P<client>\S+) > \S+?\.(?:domain|53): (?P<query_id>\d+)\+?%? (?:\[\w+\] )?'
+    rb'(?P<qtype>A|AAAA|PTR)\? (?P<qname>\S+) \(\d+\)'
+    rb'|\S+?\.(?:domain|53) > (?P<answer_client>\S+): (?P<answer_id>\d+)[*\-|$]* '
+    rb'\d+/\d+/\d+(?: (?P<answers>[^\r\n]*?))? \(\d+\))\r?$',
+    re.MULTILINE)
+ANSWER_RE = re.compile(r'(A|AAAA|PTR|CNAME) (\S+)')
+
+
+def normalize(spelling: str) -> Tuple[str, bool]:
+    """Canonical form of a host spelling and whether it is an address"""
+    key = spelling.strip().lower().rstrip('.')
+    try:
+        return str(ipaddress.ip_address(key)), True
+    except ValueError:
+        return key, False
+
+
+def pointer_address(name: str) -> Optional[str]:
+    """Address of an in-addr.arpa / ip6.arpa name, None for any other name"""
+    name = name.lower().rstrip('.')
+    try:
+        if name.endswith('.in-addr.arpa'):
+            return str(ipaddress.IPv4Address('.'.join(reversed(name[:-13].split('.')))))
+        if name.endswith('.ip6.arpa'):
+            nibbles = ''.join(reversed(name[:-9].split('.')))
+            return str(ipaddress.IPv6Address(int(nibbles, 16)))
+    except ValueError:
+        pass
+    return None
+
+
+def iter_dns_mappings(filepath: str) -> Iterator[Tuple[str, str]]:
+    """(name, address) pairs resolved by the DNS exchanges of a text capture"""
+    pending: Dict[Tuple[bytes, bytes], Tuple[str, str]] = {}
+    with CaptureReader(filepath) as reader:
+        for match in reader.scan(DNS_RE):
+            if match.group('client') is not None:
+                pending[match.group('client'), match.group('query_id')] = (
+                    match.group('qtype').decode(), match.group('qname').decode())
+                continue
+            query = pending.pop((match.group('answer_client'), match.group('answer_id')), None)
+            if query is None or not match.group('answers'):
+                continue
+            qtype, qname = query
+            for rtype, value in ANSWER_RE.findall(match.group('answers').decode()):
+                value = value.rstrip(',')
+                if qtype == 'PTR' and rtype == 'PTR':
+                    address = pointer_address(qname)
+                    if address is not None:
+                        yield value, address
+                elif qtype != 'PTR' and rtype in ('A', 'AAAA'):
+                    yield qname, value
+
+
+class EndpointTable:
+    """Interning table mapping every spelling of a host to one small-int id.
+
+    tcpdump prints a host either as an address or as the name it resolved,
+    so one machine can appear under several spellings. Spellings are
+    interned to ids, and ids known to denote the same host (through a
+    name -> address mapping) are joined in a union-find: intern(spelling)
+    returns the same id for all of them once the mapping is known.
+
+    Mappings come from the capture's own DNS traffic or from a hosts-style
+    file, never from network lookups. The most recently used max_entries
+    of them are kept in an LRU persisted as JSON at cache_path, so later
+    runs know hosts whose DNS exchange happened before the capture began.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, max_entries: int = 10_000):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.ids: Dict[str, int] = {}
+        self._parent: List[int] = []
+        self._address: List[Optional[str]] = []
+        self._name: List[Optional[str]] = []
+        # name -> address in least recently used order, and address -> name
+        self.mappings: 'OrderedDict[str, str]' = OrderedDict()
+        self._reverse: Dict[str, str] = {}
+        if cache_path and os.path.exists(cache_path):
+            self.load(cache_path)
+
+    def _new(self, spelling: str, key: str, is_address: bool) -> int:
+        ident = len(self._parent)
+        self._parent.append(ident)
+        self._address.append(key if is_address else None)
+        # Names are matched case-insensitively but shown as first spelled
+        self._name.append(None if is_address else spelling.strip().rstrip('.'))
+        self.ids[key] = ident
+        return ident
+
+    def find(self, ident: int) -> int:
+        """Canonical id of an interned id (path halving)"""
+        parent = self._parent
+        while parent[ident] != ident:
+            parent[ident] = parent[parent[ident]]
+            ident = parent[ident]
+        return ident
+
+    def _union(self, a: int, b: int) -> int:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if b < a:
+            a, b = b, a
+        # The first interned id stays canonical
+        self._parent[b] = a
+        self._address[a] = self._address[a] or self._address[b]
+        self._name[a] = self._name[a] or self._name[b]
+        return a
+
+    def intern(self, spelling: str) -> int:
+        """Canonical id of a host spelling, allocated on first sight"""
+        ident = self.ids.get(spelling)
+        if ident is not None:
+            return self.find(ident)
+        key, is_address = normalize(spelling)
+        ident = self.ids.get(key)
+        if ident is None:
+            ident = self._new(spelling, key, is_address)
+            name = self._reverse.get(key) if is_address else key
+            if name is not None and name in self.mappings:
+                self.mappings.move_to_end(name)
+                partner = name if is_address else self.mappings[name]
+                ident = self._union(ident, self.intern(partner))
+        self.ids[spelling] = ident
+        return self.find(ident)
+
+    def learn(self, name: str, address: str) -> bool:
+        """Record that name resolves to address; False if the pair is not one"""
+        name, name_is_address = normalize(name)
+        address, is_address = normalize(address)
+        if name_is_address or not is_address or not name:
+            return False
+        self.mappings[name] = address
+        self.mappings.move_to_end(name)
+        # The first name of an address is its hostname, later ones are aliases
+        self._reverse.setdefault(address, name)
+        while len(self.mappings) > self.max_entries:
+            old_name, old_address = self.mappings.popitem(last=False)
+            if self._reverse.get(old_address) == old_name:
+                del self._reverse[old_address]
+        # Hosts already seen are joined now, the others when first interned
+        if name in self.ids or address in self.ids:
+            self._union(self.intern(name), self.intern(address))
+        return True
+
+    def learn_from_capture(self, filepath: str) -> int:
+        """Learn the mappings resolved by the DNS traffic of a text capture.
+
+        pcap payloads are not decoded, so binary captures teach nothing.
+        """
+        if is_pcap(filepath):
+            return 0
+        return sum(self.learn(name, address) for name, address in iter_dns_mappings(filepath))
+
+    def load_hosts(self, path: str) -> int:
+        """Learn the mappings of a hosts-style file: address name [aliases...]"""
+        learned = 0
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                fields = line.split('#', 1)[0].split()
+                for name in fields[1:]:
+                    learned += self.learn(name, fields[0])
+        return learned
+
+    def address(self, ident: int) -> Optional[str]:
+        return self._address[self.find(ident)]
+
+    def hostname(self, ident: int) -> Optional[str]:
+        return self._name[self.find(ident)]
+
+    def label(self, ident: int) -> str:
+        """Display key of a host: its address when known, else its name"""
+        root = self.find(ident)
+        return self._address[root] or self._name[root]
+
+    def load(self, path: str):
+        try:
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get('version') != CACHE_VERSION:
+            return
+        for name, address in state.get('mappings', []):
+            self.learn(name, address)
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.cache_path
+        if not path:
+            return
+        atomic_write(path, json.dumps({'version': CACHE_VERSION,
+                                       'mappings': list(self.mappings.items())}))
+
+    def __len__(self) -> int:
+        """Number of distinct hosts interned"""
+        return sum(1 for ident, parent in enumerate(self._parent) if ident == parent)
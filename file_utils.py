@@ -0,0 +1,19 @@
+import os
+from typing import Union
+
+
+def atomic_write(path: str, data: Union[str, bytes]):
+    """Write data (text as UTF-8) to path through a temporary file renamed over it.
+
+    Readers, and a run following an interrupted one, see either the old
+    content or the new one, never a partial file.
+    """
+    partial = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(partial, 'wb') as f:
+            f.write(data.encode('utf-8') if isinstance(data, str) else data)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
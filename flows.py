@@ -0,0 +1,240 @@
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional, Tuple
+
+from records import PacketRecord
+from sketches import SpaceSaving
+from tcpdump_parser import CaptureClock
+
+HALF_OPEN_SCAN = "Half-Open Scan"
+
+# Connection states, in handshake order
+SYN_SENT = 'SYN_SENT'
+SYN_RECEIVED = 'SYN_RECEIVED'
+ESTABLISHED = 'ESTABLISHED'
+CLOSING = 'CLOSING'
+# Outcomes of finished flows
+CLOSED = 'CLOSED'
+RESET = 'RESET'
+REJECTED = 'REJECTED'    # RST answered the SYN: closed port
+HALF_OPEN = 'HALF_OPEN'  # aborted or expired before the handshake completed
+EXPIRED = 'EXPIRED'      # expired after the handshake
+
+STATE_RANK = {SYN_SENT: 0, SYN_RECEIVED: 1, ESTABLISHED: 2, CLOSING: 3}
+
+Endpoint = Tuple[str, int]
+# (protocol, lower host, its port, upper host, its port): a flat tuple of
+# atomic values, which the garbage collector stops tracking
+FlowKey = Tuple[str, str, int, str, int]
+
+
+def flow_key(record: PacketRecord) -> Tuple[FlowKey, bool]:
+    """Direction-independent 5-tuple and whether the packet goes from the lower endpoint"""
+    # -1 stands for a missing port so endpoints always compare
+    source_port = -1 if record.source_port is None else record.source_port
+    dest_port = -1 if record.dest_port is None else record.dest_port
+    if (record.source, source_port) <= (record.destination, dest_port):
+        return (record.protocol, record.source, source_port, record.destination, dest_port), True
+    return (record.protocol, record.destination, dest_port, record.source, source_port), False
+
+
+class Flow:
+    """One connection: handshake state plus per-direction counters.
+
+    'out' is the initiator to responder direction. The initiator is the
+    sender of the first packet, or of the SYN a SYN-ACK answers when the
+    capture starts mid-handshake.
+    """
+
+    __slots__ = ('initiator', 'responder', 'forward', 'state', 'first_seen', 'last_seen',
+                 'packets_out', 'packets_in', 'bytes_out', 'bytes_in', 'fins')
+
+    def __init__(self, initiator: Endpoint, responder: Endpoint, forward: bool,
+                 state: str, seen: int):
+        self.initiator = initiator
+        self.responder = responder
+        self.forward = forward  # the initiator is the lower endpoint of the key
+        self.state = state
+        self.first_seen = seen
+        self.last_seen = seen
+        self.packets_out = self.packets_in = 0
+        self.bytes_out = self.bytes_in = 0
+        self.fins = 0  # bit 1: initiator sent FIN, bit 2: responder sent FIN
+
+    @property
+    def duration(self) -> float:
+        return (self.last_seen - self.first_seen) / 1_000_000
+
+    @property
+    def half_open(self) -> bool:
+        return self.state in (SYN_SENT, SYN_RECEIVED)
+
+
+class FlowTable:
+    """Active flows keyed by 5-tuple, evicted after idle_timeout seconds.
+
+    Flows are kept in last-activity order, so expiring idle ones only looks
+    at the front of the table: every packet costs O(1) amortised. Finished
+    flows are folded into outcome counters and a per-source count of failed
+    handshakes (half-open or rejected), bounded by max_sources.
+    """
+
+    def __init__(self, idle_timeout: float = 120.0, max_flows: int = 100_000,
+                 max_sources: int = 10_000, scan_threshold: int = 20):
+        self.idle_timeout = int(idle_timeout * 1_000_000)
+        self.max_flows = max_flows
+        self.scan_threshold = scan_threshold
+        self.flows: 'OrderedDict[FlowKey, Flow]' = OrderedDict()
+        self.outcomes: Dict[str, int] = defaultdict(int)
+        self.failed = SpaceSaving(max_sources)
+        self.latest = 0
+        self._next_expiry = 0
+        self._clock = CaptureClock()
+
+    def add(self, record: PacketRecord) -> Optional[Flow]:
+        """Account a packet to its flow; returns the flow, or None once it finished"""
+        now = self._clock(record.time)
+        if now > self.latest:
+            self.latest = now
+        key, forward = flow_key(record)
+        flags = record.tcp_flags
+        syn = 'S' in flags
+        ack = '.' in flags
+
+        flow = self.flows.get(key)
+        if flow is None:
+            sender = (record.source, key[2] if forward else key[4])
+            receiver = (record.destination, key[4] if forward else key[2])
+            if record.protocol != 'TCP':
+                flow = Flow(sender, receiver, forward, ESTABLISHED, now)
+            elif syn and ack:
+                flow = Flow(receiver, sender, not forward, SYN_RECEIVED, now)
+            elif syn:
+                flow = Flow(sender, receiver, forward, SYN_SENT, now)
+            else:
+                # Connection opened before the capture started
+                flow = Flow(sender, receiver, forward, ESTABLISHED, now)
+            self.flows[key] = flow
+            if len(self.flows) > self.max_flows:
+                self._finish(self.flows.popitem(last=False)[1])
+        else:
+            flow.last_seen = now
+            self.flows.move_to_end(key)
+
+        outbound = flow.forward == forward
+        if outbound:
+            flow.packets_out += 1
+            flow.bytes_out += record.size
+        else:
+            flow.packets_in += 1
+            flow.bytes_in += record.size
+
+        if record.protocol == 'TCP' and self._advance(flow, flags, syn, ack, outbound):
+            del self.flows[key]
+            flow = None
+        # Idle flows are swept at most once per second of capture time
+        if now >= self._next_expiry:
+            self._next_expiry = now + 1_000_000
+            self.expire()
+        return flow
+
+    def _advance(self, flow: Flow, flags: str, syn: bool, ack: bool, outbound: bool) -> bool:
+        """TCP state transition; True when the flow just finished"""
+        if 'R' in flags:
+            if flow.state == SYN_SENT and not outbound:
+                self._record(flow, REJECTED)
+            else:
+                # RST before the handshake completed: a SYN (stealth) scan probe
+                self._record(flow, HALF_OPEN if flow.half_open else RESET)
+            return True
+        if 'F' in flags:
+            flow.fins |= 1 if outbound else 2
+            if flow.fins == 3:
+                self._record(flow, CLOSED)
+                return True
+            flow.state = CLOSING
+        elif syn and ack:
+            if flow.state == SYN_SENT and not outbound:
+                flow.state = SYN_RECEIVED
+        elif ack and flow.state == SYN_RECEIVED and outbound:
+            flow.state = ESTABLISHED
+        return False
+
+    def _record(self, flow: Flow, outcome: str):
+        self.outcomes[outcome] += 1
+        if outcome in (REJECTED, HALF_OPEN):
+            self.failed.add(flow.initiator[0])
+
+    def _finish(self, flow: Flow):
+        self._record(flow, HALF_OPEN if flow.half_open else EXPIRED)
+
+    def expire(self, now: Optional[int] = None):
+        """Finish every flow idle for longer than the timeout"""
+        deadline = (self.latest if now is None else now) - self.idle_timeout
+        flows = self.flows
+        while flows:
+            key, flow = next(iter(flows.items()))
+            if flow.last_seen >= deadline:
+                break
+            del flows[key]
+            self._finish(flow)
+
+    def failed_by_source(self) -> Dict[str, int]:
+        """Failed handshakes per initiator, including flows still half-open"""
+        counts = dict(self.failed.counts)
+        for flow in self.flows.values():
+            if flow.half_open:
+                source = flow.initiator[0]
+                counts[source] = counts.get(source, 0) + 1
+        return counts
+
+    def scanners(self) -> Dict[str, int]:
+        """Sources whose failed handshakes reach the scan threshold"""
+        return {source: count for source, count in self.failed_by_source().items()
+                if count >= self.scan_threshold}
+
+    def state_counts(self) -> Dict[str, int]:
+        """Active flows per state plus the outcomes of finished flows"""
+        counts = dict(self.outcomes)
+        for flow in self.flows.values():
+            counts[flow.state] = counts.get(flow.state, 0) + 1
+        return counts
+
+    def merge(self, other: 'FlowTable'):
+        """Fold in the table of a later capture chunk.
+
+        A flow active in both chunks is combined: counters add up and the
+        furthest handshake state wins. Flows that finished in one chunk but
+        are still open in the other are not reconciled. The merged table is
+        put back in last-activity order, which expire() relies on.
+        """
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] += count
+        self.failed.merge(other.failed)
+        for key, theirs in other.flows.items():
+            flow = self.flows.get(key)
+            if flow is None:
+                self.flows[key] = theirs
+                continue
+            if STATE_RANK[theirs.state] > STATE_RANK[flow.state]:
+                flow.state = theirs.state
+            flow.fins |= theirs.fins
+            flow.first_seen = min(flow.first_seen, theirs.first_seen)
+            flow.last_seen = max(flow.last_seen, theirs.last_seen)
+            if theirs.forward == flow.forward:
+                flow.packets_out += theirs.packets_out
+                flow.packets_in += theirs.packets_in
+                flow.bytes_out += theirs.bytes_out
+                flow.bytes_in += theirs.bytes_in
+            else:
+                flow.packets_out += theirs.packets_in
+                flow.packets_in += theirs.packets_out
+                flow.bytes_out += theirs.bytes_in
+                flow.bytes_in += theirs.bytes_out
+        self.flows = OrderedDict(sorted(self.flows.items(), key=lambda item: item[1].last_seen))
+        self.latest = max(self.latest, other.latest)
+        self.expire()
+        while len(self.flows) > self.max_flows:
+            self._finish(self.flows.popitem(last=False)[1])
+
+    def __len__(self) -> int:
+        return len(self.flows)
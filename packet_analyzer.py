@@ -1,13 +1,26 @@
-import matplotlib.pyplot as plt
-import numpy as np
+import argparse
+import heapq
 from collections import defaultdict
-import re
-from dataclasses import dataclass
-from typing import List, Dict, Optional, Set
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Iterable, List, Dict, Optional, Set, Tuple
 import os
-import statistics
+import time
 from datetime import datetime
 
+from capture_reader import follow_records
+from endpoints import EndpointTable
+from flows import HALF_OPEN_SCAN, FlowTable
+from pcap_reader import is_pcap
+from records import PacketRecord, ingest, parse_record
+from security_report import render_report, report_content
+from sketches import (DISTINCT_COUNTERS, RunningStats, SizeDistribution, SpaceSaving,
+                      distinct_counter)
+from window_detector import ChunkEdges, DetectionConfig, WindowConfig, WindowedDetector
+
+if TYPE_CHECKING:
+    from charts import Chart
+
 @dataclass
 class SecurityAlert:
     source_ip: str
@@ -19,27 +32,47 @@ class SecurityAlert:
     behavior_pattern: str
     related_ips: Set[str]
 
-@dataclass
-class NetworkTraffic:
-    source: str
-    destination: str
-    tcp_flags: str
-    size: int
-    time: str
-    dest_port: Optional[int] = None
+# The threat pipeline consumes the shared record type directly
+NetworkTraffic = PacketRecord
 
 class ThreatDetector:
-    def __init__(self):
+    def __init__(self, window_config: Optional[DetectionConfig] = None,
+                 port_counter: str = 'exact', max_sources: Optional[int] = None):
+        if max_sources:
+            window_config = replace(window_config or DetectionConfig(),
+                                    max_sources=max_sources)
+        self.windows = WindowedDetector(window_config)
+        # 'exact' set, 'bitmap' (8 KB) or 'hll' (1 KB estimate) per source
+        self.port_counter = port_counter
+        # With max_sources set, only the top sources by SYN count keep a
+        # threat entry, so spoofed-source floods cannot grow memory unbounded
+        self.max_sources = max_sources
+        self.heavy_hitters = SpaceSaving(max_sources) if max_sources else None
+        self.talkers = SpaceSaving(max_sources or 1000)
         self.threats = defaultdict(lambda: {
-            'traffic': [],
-            'sizes': [],
+            'packets': 0,
+            'sizes': RunningStats(),
             'syn_packets': 0,
-            'ports': set(),
+            'ports': distinct_counter(self.port_counter),
             'hostname': 'Unknown',
-            'related_ips': set()
+            'related_ips': set(),
+            'window_patterns': set()
         })
 
-    def classify_behavior(self, syn_packets: int, ports: int, size: float) -> str:
+    def observe_bytes(self, traffic: NetworkTraffic):
+        self.talkers.add(traffic.source, traffic.size)
+
+    def observe_syn(self, traffic: NetworkTraffic):
+        if self.heavy_hitters is not None:
+            evicted = self.heavy_hitters.add(traffic.source)
+            if evicted is not None:
+                self.threats.pop(evicted, None)
+        patterns = self.windows.add(traffic.source, traffic.time, traffic.dest_port)
+        if patterns:
+            self.threats[traffic.source]['window_patterns'].update(patterns)
+
+    def classify_behavior(self, syn_packets: int, ports: int, size: float,
+                          window_patterns: Iterable[str] = ()) -> str:
         patterns = []
         if ports > 4:
             patterns.append("Port Enumeration")
@@ -47,15 +80,24 @@ class ThreatDetector:
             patterns.append("SYN Attack")
         elif syn_packets > 4:
             patterns.append("Suspicious SYN Activity")
+        patterns.extend(sorted(window_patterns))
         return " | ".join(patterns) if patterns else "Unknown Pattern"
 
-    def analyze_threats(self) -> Dict:
+    def top_sources(self, limit: Optional[int] = None) -> List[str]:
+        if self.heavy_hitters is not None:
+            return [ip for ip, _ in self.heavy_hitters.top(limit)]
+        if limit is not None:
+            return heapq.nlargest(limit, self.threats,
+                                  key=lambda ip: self.threats[ip]['packets'])
+        return list(self.threats)
+
+    def analyze_threats(self, limit: Optional[int] = None) -> Dict:
         consolidated = {}
         processed = set()
         
         sorted_threats = sorted(
-            self.threats.items(),
-            key=lambda x: len(x[1]['traffic']),
+            ((ip, self.threats[ip]) for ip in self.top_sources(limit)),
+            key=lambda x: x[1]['packets'],
             reverse=True
         )
         
@@ -67,127 +109,105 @@ class ThreatDetector:
         
         return consolidated
 
+    def export_state(self) -> Dict:
+        return {
+            'threats': {ip: dict(data) for ip, data in self.threats.items()},
+            'heavy_hitters': self.heavy_hitters,
+            'talkers': self.talkers,
+            'edges': self.windows.edges
+        }
+
+    def combined(self, ips: List[str]) -> Dict:
+        """Threat entry of one host seen under several spellings"""
+        if len(ips) == 1:
+            return self.threats[ips[0]]
+        combined = self.threats.default_factory()
+        for ip in ips:
+            _merge_threat(combined, self.threats[ip])
+        return combined
+
+    def merge_state(self, state: Dict):
+        self.talkers.merge(state['talkers'])
+        for ip, data in state['threats'].items():
+            _merge_threat(self.threats[ip], data)
+        if state.get('edges') is not None:
+            # Windows straddling the chunk boundary are evaluated on the merged history
+            for ip, patterns in self.windows.replay(state['edges']).items():
+                self.threats[ip]['window_patterns'] |= patterns
+        if self.heavy_hitters is not None:
+            self.heavy_hitters.merge(state['heavy_hitters'])
+            for ip in [ip for ip in self.threats if ip not in self.heavy_hitters]:
+                del self.threats[ip]
+
+def _merge_threat(threat_data: Dict, data: Dict):
+    threat_data['packets'] += data['packets']
+    threat_data['sizes'].merge(data['sizes'])
+    threat_data['syn_packets'] += data['syn_packets']
+    threat_data['ports'].merge(data['ports'])
+    threat_data['hostname'] = data['hostname']
+    threat_data['related_ips'] |= data['related_ips']
+    threat_data['window_patterns'] |= data['window_patterns']
+
 class TrafficMonitor:
-    def __init__(self):
+    def __init__(self, port_counter: str = 'exact', max_sources: Optional[int] = None,
+                 endpoints: Optional[EndpointTable] = None,
+                 window_config: Optional[DetectionConfig] = None):
         self.traffic_data: List[NetworkTraffic] = []
         self.flag_distribution = defaultdict(int)
-        self.size_distribution = []
+        self.size_distribution = SizeDistribution()
         self.packet_total = 0
         self.potential_threats = defaultdict(lambda: {
             'syn_count': 0,
             'ports': set(),
             'sizes': []
         })
-        self.threat_detector = ThreatDetector()
+        self.threat_detector = ThreatDetector(window_config, port_counter, max_sources)
+        self.flows = FlowTable(max_sources=max_sources or 10_000)
+        # Per-spelling state is grouped by host only when reporting, so
+        # worker states merge without sharing the table
+        self.endpoints = endpoints if endpoints is not None else EndpointTable()
     
     def generate_report_content(self, alerts: List[SecurityAlert]) -> str:
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Network Security Analysis</title>
-            <style>
-                body {{ 
-                    font-family: 'Arial', sans-serif;
-                    background: linear-gradient(135deg, #1a237e, #311b92);
-                    color: #ffffff;
-                    margin: 0;
-                    padding: 3rem;
-                }}
-                h1, h2, h3 {{ 
-                    color: #ffd700;
-                    font-weight: 800;
-                    text-shadow: 2px 2px 4px rgba(0,0,0,0.5);
-                }}
-                .alert {{ 
-                    background: rgba(255,255,255,0.1);
-                    backdrop-filter: blur(10px);
-                    border-radius: 15px;
-                    margin: 2rem 0;
-                    padding: 2.5rem;
-                    box-shadow: 0 8px 32px rgba(0,0,0,0.3);
-                }}
-                .threat-level {{ 
-                    color: #ff4081;
-                    font-size: 1.2em;
-                    letter-spacing: 2px;
-                }}
-                .metrics {{ 
-                    background: rgba(0,0,0,0.2);
-                    padding: 1.5rem;
-                    border-radius: 10px;
-                    border: 1px solid rgba(255,255,255,0.2);
-                    margin-top: 1rem;
-                }}
-                #charts {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-                    gap: 2rem;
-                    margin: 3rem 0;
-                }}
-                img {{
-                    width: 100%;
-                    border-radius: 12px;
-                    box-shadow: 0 5px 15px rgba(0,0,0,0.4);
-                    transition: transform 0.3s ease;
-                }}
-                img:hover {{
-                    transform: scale(1.02);
-                }}
-            </style>
-        </head>
-        <body>
-            <h1>Security Analysis Report</h1>
-            <p>Generated: {timestamp}</p>
-
-            <div id="charts">
-                <div>
-                    <h3>TCP Flags Analysis</h3>
-                    <img src="flag_analysis.png" alt="TCP Flags">
-                </div>
-                <div>
-                    <h3>Packet Size Analysis</h3>
-                    <img src="size_analysis.png" alt="Packet Sizes">
-                </div>
-            </div>
-
-            <h2>Security Alerts</h2>
-            {"".join(f'''
-            <div class="alert">
-                <h3>Alert Details</h3>
-                <p><b>IP:</b> {alert.source_ip}</p>
-                <p class="threat-level">Pattern: {alert.behavior_pattern}</p>
-                <div class="metrics">
-                    <p>Packets: {alert.total_packets}</p>
-                    <p>Avg Size: {alert.packet_size_mean:.1f} bytes</p>
-                    <p>SYN Count: {alert.syn_packets}</p>
-                    <p>Port Count: {alert.targeted_ports}</p>
-                </div>
-            </div>
-            ''' for alert in alerts)}
-        </body>
-        </html>
-        """
-
-    def get_alerts(self) -> List[SecurityAlert]:
+        return report_content(alerts)
+
+    def host_groups(self, sources: Iterable[str]) -> Dict[int, List[str]]:
+        """Spellings of the sources grouped by host id, in first-seen order"""
+        groups: Dict[int, List[str]] = {}
+        for source in sources:
+            groups.setdefault(self.endpoints.intern(source), []).append(source)
+        return groups
+
+    def identify(self, ident: int, spelling: str) -> Tuple[str, str]:
+        """Address and hostname of a host, falling back to the spelling seen"""
+        return (self.endpoints.address(ident) or spelling,
+                self.endpoints.hostname(ident) or spelling)
+
+    def get_alerts(self, limit: Optional[int] = None) -> List[SecurityAlert]:
         alerts = []
-        for ip, data in self.threat_detector.threats.items():
-            if not data['traffic']:
+        scanners = self.flows.scanners()
+        sources = self.threat_detector.top_sources(limit)
+        for ident, spellings in self.host_groups(sources).items():
+            data = self.threat_detector.combined(spellings)
+            if not data['packets']:
                 continue
                 
-            avg = statistics.mean(data['sizes']) if data['sizes'] else 0
+            avg = data['sizes'].mean
+            patterns = data['window_patterns']
+            if any(ip in scanners for ip in spellings):
+                patterns = patterns | {HALF_OPEN_SCAN}
+            source_ip, hostname = self.identify(ident, spellings[0])
             alert = SecurityAlert(
-                source_ip=ip,
-                hostname=data['hostname'],
-                total_packets=len(data['traffic']),
+                source_ip=source_ip,
+                hostname=hostname,
+                total_packets=data['packets'],
                 packet_size_mean=avg,
                 syn_packets=data['syn_packets'],
                 targeted_ports=len(data['ports']),
                 behavior_pattern=self.threat_detector.classify_behavior(
                     data['syn_packets'],
                     len(data['ports']),
-                    avg
+                    avg,
+                    patterns
                 ),
                 related_ips=data['related_ips']
             )
@@ -195,48 +215,47 @@ class TrafficMonitor:
         
         return sorted(alerts, key=lambda x: x.total_packets, reverse=True)
 
+    def get_window_alerts(self) -> List[SecurityAlert]:
+        alerts = []
+        threats = self.threat_detector.threats
+        for ip, stats in self.threat_detector.windows.snapshot().items():
+            source_ip, hostname = self.identify(self.endpoints.intern(ip), ip)
+            alerts.append(SecurityAlert(
+                source_ip=source_ip,
+                hostname=hostname,
+                total_packets=stats.long_syn,
+                packet_size_mean=threats[ip]['sizes'].mean if ip in threats else 0,
+                syn_packets=stats.long_syn,
+                targeted_ports=stats.long_ports,
+                behavior_pattern=" | ".join(stats.patterns) or "Unknown Pattern",
+                related_ips={ip}
+            ))
+        return sorted(alerts, key=lambda x: x.syn_packets, reverse=True)
+
     def save_report(self, output_path: str):
         alerts = self.get_alerts()
-        html = self.generate_report_content(alerts)
         with open(os.path.join(output_path, 'security_report.html'), 'w', encoding='utf-8') as f:
-            f.write(html)
+            render_report(f, alerts)
 
     def parse_traffic(self, line: str) -> Optional[NetworkTraffic]:
-        if not line.strip() or line.startswith('0x'):
+        record = parse_record(line)
+        if record is None or record.protocol != 'TCP':
             return None
+        return record
 
-        patterns = {
-            'time': r'^(\d{2}:\d{2}:\d{2}\.\d{6})',
-            'ip': r'(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})',
-            'flags': r'Flags \[(.*?)\]',
-            'size': r'length (\d+)',
-            'port': r'\.(\d+)'
-        }
-
-        try:
-            matches = {k: re.search(v, line) for k, v in patterns.items()}
-            ips = re.findall(patterns['ip'], line)
-            ports = re.findall(patterns['port'], line)
-
-            if all([matches['time'], ips, matches['flags'], matches['size']]):
-                return NetworkTraffic(
-                    source=ips[0],
-                    destination=ips[1] if len(ips) > 1 else None,
-                    tcp_flags=matches['flags'].group(1),
-                    size=int(matches['size'].group(1)),
-                    time=matches['time'].group(1),
-                    dest_port=int(ports[1]) if len(ports) > 1 else None
-                )
-        except (IndexError, AttributeError, ValueError):
-            pass
-        return None
+    def add_record(self, record: PacketRecord):
+        """Sink for records.ingest(): only TCP packets matter to the threat pipeline"""
+        if record.protocol == 'TCP':
+            self.process_traffic(record)
 
     def process_traffic(self, traffic: NetworkTraffic):
         if not traffic:
             return
 
         self.packet_total += 1
-        self.size_distribution.append(traffic.size)
+        self.size_distribution.add(traffic.size)
+        self.threat_detector.observe_bytes(traffic)
+        self.flows.add(traffic)
 
         if traffic.tcp_flags:
             flag_type = self._categorize_flags(traffic.tcp_flags)
@@ -247,10 +266,11 @@ class TrafficMonitor:
                 threat_data['syn_packets'] += 1
                 if traffic.dest_port:
                     threat_data['ports'].add(traffic.dest_port)
-                threat_data['sizes'].append(traffic.size)
+                threat_data['packets'] += 1
+                threat_data['sizes'].add(traffic.size)
                 threat_data['hostname'] = traffic.source
                 threat_data['related_ips'].add(traffic.source)
-                threat_data['traffic'].append(traffic)
+                self.threat_detector.observe_syn(traffic)
 
     def _categorize_flags(self, flags: str) -> str:
         categories = {
@@ -266,92 +286,234 @@ class TrafficMonitor:
                 return category
         return flags
 
-    def analyze_log(self, filepath: str):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                if traffic := self.parse_traffic(line):
-                    self.process_traffic(traffic)
+    def analyze_log(self, filepath: str, workers: int = 1):
+        if workers > 1 and not is_pcap(filepath):
+            self._analyze_log_parallel(filepath, workers)
+            return
+        ingest(filepath, [self])
 
-    def create_visualizations(self, output_path: str):
-        os.makedirs(output_path, exist_ok=True)
-        
-        if self.size_distribution:
-            plt.figure(figsize=(12, 6))
-            bins = np.linspace(0, max(self.size_distribution), 40)
-            plt.hist(self.size_distribution, bins=bins, color='#4a148c', 
-                    edgecolor='#e1bee7', alpha=0.8)
-            plt.title('Packet Size Distribution')
-            plt.xlabel('Size (bytes)')
-            plt.ylabel('Frequency')
-            plt.grid(True, alpha=0.3)
-            plt.savefig(os.path.join(output_path, 'size_analysis.png'),
-                       facecolor='#1a237e', edgecolor='none')
-            plt.close()
+    def analyze_pcap(self, filepath: str):
+        ingest(filepath, [self])
 
+    def _analyze_log_parallel(self, filepath: str, workers: int):
+        detector = self.threat_detector
+        options = (detector.port_counter, detector.max_sources, detector.windows.config)
+        chunks = [(filepath, start, end, *options)
+                  for start, end in split_capture(filepath, workers * 4)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map() yields in submission order, so merging keeps file order
+            for state in executor.map(_analyze_chunk, chunks):
+                self.merge_state(state)
+
+    def export_state(self) -> Dict:
+        return {
+            'packet_total': self.packet_total,
+            'flag_distribution': dict(self.flag_distribution),
+            'size_distribution': self.size_distribution,
+            'threats': self.threat_detector.export_state(),
+            'flows': self.flows
+        }
+
+    def merge_state(self, state: Dict):
+        self.packet_total += state['packet_total']
+        for flag_type, count in state['flag_distribution'].items():
+            self.flag_distribution[flag_type] += count
+        self.size_distribution.merge(state['size_distribution'])
+        self.threat_detector.merge_state(state['threats'])
+        self.flows.merge(state['flows'])
+
+    def chart_specs(self, output_path: str) -> List['Chart']:
+        """Charts of the size and flag distributions, as plain aggregates"""
+        # numpy and matplotlib are only loaded when charts are asked for
+        from charts import flag_pie, size_histogram
+        charts = []
+        if self.size_distribution:
+            edges, counts = self.size_distribution.histogram.bins()
+            charts.append(size_histogram(os.path.join(output_path, 'size_analysis.png'),
+                                         edges, counts, self.size_distribution.stats.maximum))
         if self.flag_distribution:
-            plt.figure(figsize=(10, 10))
-            flags = list(self.flag_distribution.keys())
-            counts = list(self.flag_distribution.values())
-            colors = ['#ff4081', '#ffd700', '#18ffff', '#69f0ae', '#b388ff']
-            plt.pie(counts, labels=flags, autopct='%1.1f%%', colors=colors)
-            plt.title('TCP Flag Distribution', color='white')
-            plt.axis('equal')
-            plt.savefig(os.path.join(output_path, 'flag_analysis.png'),
-                       facecolor='#1a237e', edgecolor='none')
-            plt.close()
+            charts.append(flag_pie(os.path.join(output_path, 'flag_analysis.png'),
+                                   dict(self.flag_distribution)))
+        return charts
+
+    def create_visualizations(self, output_path: str, workers: Optional[int] = None) -> int:
+        from charts import render_charts
+        os.makedirs(output_path, exist_ok=True)
+        return render_charts(self.chart_specs(output_path), workers)
 
     def get_metrics(self) -> Dict:
         return {
             'packets_processed': self.packet_total,
-            'unique_sizes': len(set(self.size_distribution)),
-            'mean_size': statistics.mean(self.size_distribution) if self.size_distribution else 0,
+            'unique_sizes': self.size_distribution.distinct_sizes,
+            'mean_size': self.size_distribution.stats.mean,
+            'size_stdev': self.size_distribution.stats.stdev,
+            'size_p50': self.size_distribution.quantiles.quantile(0.50),
+            'size_p95': self.size_distribution.quantiles.quantile(0.95),
+            'size_p99': self.size_distribution.quantiles.quantile(0.99),
             'threat_count': len(self.potential_threats),
+            'top_talkers': self.threat_detector.talkers.top(10),
+            'active_flows': len(self.flows),
+            'flow_states': self.flows.state_counts(),
             'flags': dict(self.flag_distribution)
         }
 
-def main():
-    monitor = TrafficMonitor()
-    
-    import tkinter as tk
-    from tkinter import filedialog
-    root = tk.Tk()
-    root.withdraw()
-    
-    log_path = filedialog.askopenfilename(
-        title='Select tcpdump log file',
-        filetypes=[('Text files', '*.txt'), ('All files', '*.*')]
+def split_capture(filepath: str, parts: int) -> List[Tuple[int, int]]:
+    # Hex-dump continuation lines are indented: each boundary is pushed
+    # forward to the next unindented line so a record never straddles ranges.
+    size = os.path.getsize(filepath)
+    boundaries = [0]
+    with open(filepath, 'rb') as f:
+        for i in range(1, parts):
+            target = max(size * i // parts, boundaries[-1])
+            f.seek(target)
+            if target:
+                f.readline()
+            while True:
+                pos = f.tell()
+                line = f.readline()
+                if not line or line[:1] not in (b'\t', b' '):
+                    break
+            boundaries.append(min(pos, size))
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+def _analyze_chunk(chunk: Tuple[str, int, int, str, Optional[int], DetectionConfig]) -> Dict:
+    filepath, start, end, port_counter, max_sources, config = chunk
+    monitor = TrafficMonitor(port_counter, max_sources, window_config=config)
+    windows = monitor.threat_detector.windows
+    windows.edges = ChunkEdges(windows.margin)
+    ingest(filepath, [monitor], start, end)
+    return monitor.export_state()
+
+def window_config(short_window: int, long_window: int) -> DetectionConfig:
+    long_bucket = max(1, long_window // 60)
+    return DetectionConfig(
+        short=WindowConfig(1, max(1, short_window)),
+        long=WindowConfig(long_bucket, max(1, long_window // long_bucket))
     )
-    
-    if not log_path:
-        print("No file selected")
+
+def follow(log_path: str, interval: float, config: DetectionConfig,
+           from_start: bool = False, port_counter: str = 'exact',
+           max_sources: Optional[int] = None):
+    monitor = TrafficMonitor(port_counter, max_sources, window_config=config)
+    next_emit = time.monotonic() + interval
+
+    print(f"Following: {log_path} (alerts every {interval:g}s, windows "
+          f"{config.short.seconds}s/{config.long.seconds}s)")
+    windows = monitor.threat_detector.windows
+    # Capture time reached by the last record, and when it was read
+    since, last_record = windows.latest, time.monotonic()
+    for line in follow_records(log_path, poll_interval=min(interval, 0.5),
+                               from_start=from_start):
+        if line is None:
+            windows.expire_idle(since, time.monotonic() - last_record)
+        else:
+            if traffic := monitor.parse_traffic(line):
+                monitor.process_traffic(traffic)
+            since, last_record = windows.latest, time.monotonic()
+
+        if time.monotonic() >= next_emit:
+            next_emit += interval
+            stamp = datetime.now().strftime('%H:%M:%S')
+            for alert in monitor.get_window_alerts():
+                if alert.behavior_pattern == "Unknown Pattern":
+                    continue
+                print(f"[{stamp}] {alert.source_ip}: {alert.behavior_pattern} "
+                      f"(SYN {alert.syn_packets}, ports {alert.targeted_ports} "
+                      f"in last {config.long.seconds}s)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze tcpdump captures for SYN scans and floods')
+    parser.add_argument('capture', nargs='?',
+                        help='tcpdump text log or pcap file to analyze')
+    parser.add_argument('-o', '--output-dir', default='analysis_output',
+                        help='directory receiving the charts and the HTML report')
+    parser.add_argument('--no-charts', action='store_true',
+                        help='skip the PNG charts (matplotlib is then never imported)')
+    parser.add_argument('--no-report', action='store_true',
+                        help='skip the HTML security report')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes splitting a text capture')
+    parser.add_argument('--follow', metavar='LOG',
+                        help='tail a growing capture headlessly and emit rolling alerts')
+    parser.add_argument('--interval', type=float, default=10.0,
+                        help='seconds between alert emissions in follow mode')
+    parser.add_argument('--short-window', type=int, default=10,
+                        help='seconds covered by the burst/flood detection window')
+    parser.add_argument('--long-window', type=int, default=3600,
+                        help='seconds covered by the slow scan detection window')
+    parser.add_argument('--from-start', action='store_true',
+                        help='in follow mode, read the existing file content first')
+    parser.add_argument('--port-counter', choices=sorted(DISTINCT_COUNTERS), default='exact',
+                        help='per-source distinct port counting: exact set, bitmap or HyperLogLog')
+    parser.add_argument('--max-sources', type=int, default=10_000,
+                        help='number of heavy-hitter sources tracked (memory ceiling)')
+    parser.add_argument('--top', type=int, default=None,
+                        help='only report the top N sources by SYN count')
+    parser.add_argument('--hosts', metavar='FILE',
+                        help='hosts-style file of name/address mappings (address name [aliases...])')
+    parser.add_argument('--endpoint-cache', default='.endpoint_cache.json',
+                        help='file persisting the name/address mappings learned across runs')
+    args = parser.parse_args()
+
+    if args.follow:
+        try:
+            follow(args.follow, args.interval,
+                   window_config(args.short_window, args.long_window),
+                   args.from_start, args.port_counter, args.max_sources)
+        except KeyboardInterrupt:
+            pass
         return
+    if not args.capture:
+        parser.error('a capture file is required unless --follow is given')
+    if not os.path.isfile(args.capture):
+        parser.error(f'no such capture file: {args.capture}')
 
-    print(f"Analyzing: {log_path}")
+    endpoints = EndpointTable(args.endpoint_cache)
+    if args.hosts:
+        endpoints.load_hosts(args.hosts)
+    monitor = TrafficMonitor(args.port_counter, args.max_sources, endpoints,
+                             window_config(args.short_window, args.long_window))
     
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    output_dir = os.path.join(base_dir, 'analysis_output')
-    os.makedirs(output_dir, exist_ok=True)
+    log_path = args.capture
+    print(f"Analyzing: {log_path}")
     
-    monitor.analyze_log(log_path)
-    monitor.create_visualizations(output_dir)
-    monitor.save_report(output_dir)
+    endpoints.learn_from_capture(log_path)
+    monitor.analyze_log(log_path, args.workers)
+    endpoints.save()
+    outputs = []
+    if not args.no_charts:
+        monitor.create_visualizations(args.output_dir)
+        outputs.append('Visualizations')
+    if not args.no_report:
+        os.makedirs(args.output_dir, exist_ok=True)
+        monitor.save_report(args.output_dir)
+        outputs.append('Report')
     
     metrics = monitor.get_metrics()
     print("\nAnalysis Summary:")
     print(f"Total packets: {metrics['packets_processed']}")
     print(f"Distinct sizes: {metrics['unique_sizes']}")
     print(f"Average size: {metrics['mean_size']:.2f} bytes")
+    print(f"Size p50/p95/p99: {metrics['size_p50']:.0f} / {metrics['size_p95']:.0f} / {metrics['size_p99']:.0f} bytes")
     print(f"Potential threats: {metrics['threat_count']}")
     
+    print("\nTop talkers (bytes):")
+    for source, size in metrics['top_talkers']:
+        print(f"{source}: {size}")
+
     print("\nTCP Flags Distribution:")
     for flag, count in metrics['flags'].items():
         print(f"{flag}: {count}")
 
-    print(f"\nVisualizations saved to: {output_dir}")
+    if outputs:
+        print(f"\n{' and '.join(outputs)} saved to: {args.output_dir}")
     
     print("\nDetected Threats:")
-    for alert in monitor.get_alerts():
+    for alert in monitor.get_alerts(args.top):
         print(f"\nSource: {alert.source_ip}")
+        if alert.hostname != alert.source_ip:
+            print(f"Host: {alert.hostname}")
         print(f"Pattern: {alert.behavior_pattern}")
         print(f"Packet count: {alert.total_packets}")
         print(f"Targeted ports: {alert.targeted_ports}")
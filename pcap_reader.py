@@ -0,0 +1,249 @@
+import socket
+import struct
+from datetime import datetime
+from typing import BinaryIO, Iterator, Optional
+
+# (protocol, fields) where protocol is 'TCP', 'UDP' or 'ARP' and fields follow
+# the same layout as tcpdump_parser.parse_line.
+from tcpdump_parser import Packet
+
+PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1_000_000),
+    b'\xa1\xb2\xc3\xd4': ('>', 1_000_000),
+    b'\x4d\x3c\xb2\xa1': ('<', 1_000_000_000),
+    b'\xa1\xb2\x3c\x4d': ('>', 1_000_000_000),
+}
+PCAPNG_MAGIC = b'\x0a\x0d\x0d\x0a'
+
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_ARP = 0x0806
+ETHERTYPE_VLAN = (0x8100, 0x88a8)
+ETHERTYPE_IPV6 = 0x86dd
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+IPV6_EXTENSION_HEADERS = (0, 43, 60)
+IPV6_FRAGMENT_HEADER = 44
+
+# Same order tcpdump prints them in: FIN, SYN, RST, PSH, ACK, URG, ECE, CWR
+TCP_FLAG_CHARS = 'FSRP.UEW'
+
+_ethernet = struct.Struct('!12xH')
+_vlan = struct.Struct('!2xH')
+_sll = struct.Struct('!14xH')
+_ipv4 = struct.Struct('!BxH5xB2x4s4s')
+_ipv6 = struct.Struct('!4xHBx16s16s')
+_ports = struct.Struct('!HH')
+_tcp_offset_flags = struct.Struct('!12xBB')
+_udp_length = struct.Struct('!4xH')
+_arp = struct.Struct('!6xH6s4s6s4s')
+
+
+def is_pcap(filepath: str) -> bool:
+    """Tell whether a file is a binary pcap/pcapng capture"""
+    with open(filepath, 'rb') as f:
+        magic = f.read(4)
+    return magic in PCAP_MAGIC or magic == PCAPNG_MAGIC
+
+
+def format_time(seconds: int, fraction: int, resolution: int) -> str:
+    micros = fraction * 1_000_000 // resolution
+    return f"{datetime.fromtimestamp(seconds).strftime('%H:%M:%S')}.{micros:06d}"
+
+
+def tcp_flags(bits: int) -> str:
+    return ''.join(char for i, char in enumerate(TCP_FLAG_CHARS) if bits & (1 << i))
+
+
+def decode_transport(proto: int, src: str, dst: str, payload: memoryview,
+                     time: str, segment_length: int) -> Optional[Packet]:
+    """Decode a TCP/UDP header.
+
+    segment_length is the transport segment length announced by the IP
+    header: with a snaplen, payload only holds the captured bytes.
+    """
+    if proto == IPPROTO_TCP and len(payload) >= 14:
+        sport, dport = _ports.unpack_from(payload)
+        offset, flags = _tcp_offset_flags.unpack_from(payload)
+        length = max(segment_length - (offset >> 4) * 4, 0)
+        return 'TCP', (time, src, sport, dst, dport, tcp_flags(flags), length)
+    if proto == IPPROTO_UDP and len(payload) >= 8:
+        sport, dport = _ports.unpack_from(payload)
+        length = max(_udp_length.unpack_from(payload)[0] - 8, 0)
+        return 'UDP', (time, src, sport, dst, dport, '', length)
+    return None
+
+
+def decode_ipv4(data: memoryview, time: str) -> Optional[Packet]:
+    if len(data) < 20:
+        return None
+    version_ihl, total_length, proto, src, dst = _ipv4.unpack_from(data)
+    header_length = (version_ihl & 0x0f) * 4
+    # A zero total length (TCP segmentation offload) leaves only the captured size
+    total_length = total_length or len(data)
+    # Trim Ethernet padding using the IP total length
+    payload = data[header_length:total_length]
+    return decode_transport(proto, socket.inet_ntoa(src), socket.inet_ntoa(dst),
+                            payload, time, total_length - header_length)
+
+
+def decode_ipv6(data: memoryview, time: str) -> Optional[Packet]:
+    if len(data) < 40:
+        return None
+    payload_length, next_header, src, dst = _ipv6.unpack_from(data)
+    # A zero payload length (jumbogram) leaves only the captured size
+    payload_length = payload_length or len(data) - 40
+    payload = data[40:40 + payload_length]
+    while next_header in IPV6_EXTENSION_HEADERS or next_header == IPV6_FRAGMENT_HEADER:
+        if len(payload) < 8:
+            return None
+        header_length = 8 if next_header == IPV6_FRAGMENT_HEADER else (payload[1] + 1) * 8
+        next_header = payload[0]
+        payload = payload[header_length:]
+        payload_length -= header_length
+    return decode_transport(next_header,
+                            socket.inet_ntop(socket.AF_INET6, bytes(src)),
+                            socket.inet_ntop(socket.AF_INET6, bytes(dst)),
+                            payload, time, payload_length)
+
+
+def decode_arp(data: memoryview, time: str, frame_length: int) -> Optional[Packet]:
+    if len(data) < 28:
+        return None
+    _, _, sender_ip, _, target_ip = _arp.unpack_from(data)
+    return 'ARP', (time, socket.inet_ntoa(sender_ip), None,
+                   socket.inet_ntoa(target_ip), None, '', frame_length)
+
+
+def decode_frame(linktype: int, frame: memoryview, time: str,
+                 frame_length: int) -> Optional[Packet]:
+    if linktype == LINKTYPE_ETHERNET:
+        if len(frame) < 14:
+            return None
+        ethertype = _ethernet.unpack_from(frame)[0]
+        offset = 14
+        while ethertype in ETHERTYPE_VLAN and len(frame) >= offset + 4:
+            ethertype = _vlan.unpack_from(frame, offset)[0]
+            offset += 4
+        data = frame[offset:]
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < 16:
+            return None
+        ethertype = _sll.unpack_from(frame)[0]
+        data = frame[16:]
+    elif linktype == LINKTYPE_RAW:
+        version = frame[0] >> 4 if len(frame) else 0
+        ethertype = ETHERTYPE_IPV6 if version == 6 else ETHERTYPE_IPV4
+        data = frame
+    elif linktype == LINKTYPE_NULL:
+        family = int.from_bytes(frame[:4], 'little') if len(frame) >= 4 else 0
+        ethertype = ETHERTYPE_IPV4 if family == socket.AF_INET else ETHERTYPE_IPV6
+        data = frame[4:]
+    else:
+        return None
+
+    if ethertype == ETHERTYPE_IPV4:
+        return decode_ipv4(data, time)
+    if ethertype == ETHERTYPE_IPV6:
+        return decode_ipv6(data, time)
+    if ethertype == ETHERTYPE_ARP:
+        return decode_arp(data, time, frame_length)
+    return None
+
+
+def _read_pcap(f: BinaryIO, magic: bytes) -> Iterator[Packet]:
+    endian, resolution = PCAP_MAGIC[magic]
+    header = f.read(20)
+    if len(header) < 20:
+        return
+    linktype = struct.unpack(endian + '16xI', header)[0] & 0x0fffffff
+    record = struct.Struct(endian + 'IIII')
+    while True:
+        raw = f.read(record.size)
+        if len(raw) < record.size:
+            return
+        seconds, fraction, captured, original = record.unpack(raw)
+        frame = memoryview(f.read(captured))
+        packet = decode_frame(linktype, frame,
+                              format_time(seconds, fraction, resolution), original)
+        if packet:
+            yield packet
+
+
+def _tsresol(options: memoryview, endian: str) -> int:
+    # if_tsresol (code 9): power of ten, or power of two when the MSB is set
+    offset = 0
+    while offset + 4 <= len(options):
+        code, length = struct.unpack_from(endian + 'HH', options, offset)
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            value = options[offset + 4]
+            return 2 ** (value & 0x7f) if value & 0x80 else 10 ** value
+        offset += 4 + (length + 3) // 4 * 4
+    return 1_000_000
+
+
+def _read_pcapng(f: BinaryIO) -> Iterator[Packet]:
+    endian = '<'
+    interfaces = []
+    f.seek(0)
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            return
+        if head[:4] == PCAPNG_MAGIC:
+            byte_order = f.read(4)
+            endian = '<' if byte_order == b'\x4d\x3c\x2b\x1a' else '>'
+            block_length = struct.unpack(endian + 'I', head[4:])[0]
+            f.seek(block_length - 12, 1)
+            interfaces = []
+            continue
+
+        block_type, block_length = struct.unpack(endian + 'II', head)
+        if block_length < 12:
+            return
+        body = memoryview(f.read(block_length - 8))[:-4]
+
+        if block_type == 1:
+            linktype = struct.unpack_from(endian + 'H', body)[0]
+            interfaces.append((linktype, _tsresol(body[8:], endian)))
+        elif block_type in (2, 6) and len(body) >= 20:
+            # Enhanced Packet Block (6) and obsolete Packet Block (2)
+            if block_type == 6:
+                interface, high, low, captured, original = struct.unpack_from(endian + 'IIIII', body)
+            else:
+                interface, _, high, low, captured, original = struct.unpack_from(endian + 'HHIIII', body)
+            if interface >= len(interfaces):
+                continue
+            linktype, resolution = interfaces[interface]
+            seconds, fraction = divmod((high << 32) | low, resolution)
+            packet = decode_frame(linktype, body[20:20 + captured],
+                                  format_time(seconds, fraction, resolution), original)
+            if packet:
+                yield packet
+        elif block_type == 3 and len(body) >= 4 and interfaces:
+            # Simple Packet Block: no timestamp, always interface 0
+            original = struct.unpack_from(endian + 'I', body)[0]
+            linktype, _ = interfaces[0]
+            packet = decode_frame(linktype, body[4:4 + original],
+                                  format_time(0, 0, 1), original)
+            if packet:
+                yield packet
+
+
+def iter_packets(filepath: str) -> Iterator[Packet]:
+    """Decode every supported frame of a pcap or pcapng file"""
+    with open(filepath, 'rb') as f:
+        magic = f.read(4)
+        if magic in PCAP_MAGIC:
+            yield from _read_pcap(f, magic)
+        elif magic == PCAPNG_MAGIC:
+            yield from _read_pcapng(f)
+        else:
+            raise ValueError(f"{filepath} is not a pcap or pcapng capture")
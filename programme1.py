@@ -1,36 +1,4 @@
-def parse_ics_datetime(dt_str):
-    """Convertit une date au format ICS en format lisible"""
-    if not dt_str:  # Vérification si la chaîne est vide
-        return "01-01-2024", "00:00"  # Valeurs par défaut
-    
-    try:
-        year = dt_str[0:4]
-        month = dt_str[4:6]
-        day = dt_str[6:8]
-        hour = dt_str[9:11]
-        minute = dt_str[11:13]
-        return f"{day}-{month}-{year}", f"{hour}:{minute}"
-    except IndexError:
-        return "01-01-2024", "00:00"  # En cas d'erreur de format
-
-def calculate_duration(start_dt, end_dt):
-    """Calcule la durée entre deux dates ICS"""
-    try:
-        # Convertir en minutes depuis minuit
-        start_minutes = int(start_dt[9:11]) * 60 + int(start_dt[11:13])
-        end_minutes = int(end_dt[9:11]) * 60 + int(end_dt[11:13])
-        
-        # Calculer la différence
-        duration_minutes = end_minutes - start_minutes
-        if duration_minutes < 0:  # Si la durée est négative
-            duration_minutes = 0
-            
-        hours = duration_minutes // 60
-        minutes = duration_minutes % 60
-        
-        return f"{hours:02d}:{minutes:02d}"
-    except (IndexError, ValueError):
-        return "00:00"  # En cas d'erreur de format
+from calendrier import calculate_duration, load_calendar, parse_ics_datetime
 
 def extract_event_info(filename):
     """Extrait les informations d'un événement depuis un fichier ICS"""
@@ -43,22 +11,11 @@ def extract_event_info(filename):
         'description': ''
     }
     
-    in_event = False
-    with open(filename, 'r', encoding='utf-8') as file:
-        for line in file:
-            line = line.strip()
-            if line == "BEGIN:VEVENT":
-                in_event = True
-                continue
-            elif line == "END:VEVENT":
-                in_event = False
-                break
-                
-            if in_event and ':' in line:
-                key, value = line.split(':', 1)
-                key = key.lower()  # Convertir en minuscules pour la comparaison
-                if key in event_data:
-                    event_data[key] = value
+    # Le calendrier est lu une fois puis servi par le cache
+    store = load_calendar(filename)
+    if len(store):
+        for key, value in store.events[0].properties().items():
+            event_data[key.lower()] = value
     
     return event_data
 
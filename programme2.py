@@ -1,40 +1,34 @@
-def parse_ics_datetime(dt_str):
-    """Convertit une date au format ICS en format lisible"""
-    year = dt_str[0:4]
-    month = dt_str[4:6]
-    day = dt_str[6:8]
-    hour = dt_str[9:11]
-    minute = dt_str[11:13]
-    return f"{day}-{month}-{year}", f"{hour}:{minute}"
+import argparse
+import csv
+import sys
+from functools import lru_cache
+from operator import attrgetter
+from typing import Iterable, Sequence, TextIO
 
-def calculate_duration(start_dt, end_dt):
-    """Calcule la durée entre deux dates ICS"""
-    start_minutes = int(start_dt[9:11]) * 60 + int(start_dt[11:13])
-    end_minutes = int(end_dt[9:11]) * 60 + int(end_dt[11:13])
-    duration_minutes = end_minutes - start_minutes
-    hours = duration_minutes // 60
-    minutes = duration_minutes % 60
-    return f"{hours:02d}:{minutes:02d}"
+from calendrier import Event, calculate_duration, load_calendar, parse_ics_datetime
+
+# Un calendrier réutilise peu de créneaux : dates et durées sont calculées une fois par créneau
+_start_cached = lru_cache(maxsize=4096)(parse_ics_datetime)
+_duration_cached = lru_cache(maxsize=4096)(calculate_duration)
+
+# Colonnes de l'export pseudo-CSV, dans l'ordre de format_pseudo_csv, tirées
+# des champs déjà analysés du calendrier
+FIELDS = {
+    'uid': lambda event: event.uid or 'vide',
+    'date': lambda event: _start_cached(event.dtstart)[0],
+    'heure': lambda event: _start_cached(event.dtstart)[1],
+    'duree': lambda event: _duration_cached(event.dtstart, event.dtend),
+    'modalite': attrgetter('modality'),
+    'summary': lambda event: event.summary or 'vide',
+    'location': lambda event: event.location or 'vide',
+    'prof': attrgetter('prof'),
+    'groupe': lambda event: event.group or 'vide',
+}
+COLUMNS = tuple(FIELDS)
 
 def extract_events(filename):
     """Extrait tous les événements d'un fichier ICS"""
-    events = []
-    current_event = None
-    
-    with open(filename, 'r', encoding='utf-8') as file:
-        for line in file:
-            line = line.strip()
-            if line == "BEGIN:VEVENT":
-                current_event = {}
-            elif line == "END:VEVENT":
-                if current_event:
-                    events.append(current_event)
-                current_event = None
-            elif current_event is not None and ':' in line:
-                key, value = line.split(':', 1)
-                current_event[key] = value
-    
-    return events
+    return [event.properties() for event in load_calendar(filename)]
 
 def format_pseudo_csv(event):
     """Formate un événement en format pseudo-CSV"""
@@ -68,16 +62,58 @@ def format_pseudo_csv(event):
     return f"{event.get('UID', 'vide')};{date};{heure};{duree};{modalite};" \
            f"{event.get('SUMMARY', 'vide')};{event.get('LOCATION', 'vide')};{prof};{groupe}"
 
+def export_pseudo_csv(events: Iterable[Event], output: TextIO,
+                      columns: Sequence[str] = COLUMNS, delimiter: str = ';') -> int:
+    """Écrit les séances en une passe bufferisée ; renvoie le nombre de lignes écrites.
+
+    Les lignes sont produites au fil des séances : un itérateur (iter_events)
+    s'exporte sans être chargé en mémoire. Seules les colonnes demandées sont
+    calculées ; les valeurs sont déséchappées et le module csv met entre
+    guillemets celles qui contiennent le séparateur.
+    """
+    unknown = set(columns) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Colonnes inconnues : {', '.join(sorted(unknown))}")
+    getters = [FIELDS[column] for column in columns]
+    writer = csv.writer(output, delimiter=delimiter, lineterminator='\n')
+    count = 0
+    for event in events:
+        writer.writerow([getter(event) for getter in getters])
+        count += 1
+    return count
+
 def main():
-    filename = "evenementSAE_15.ics"  # Correction du nom du fichier
+    parser = argparse.ArgumentParser(description="Export pseudo-CSV des séances d'un calendrier ICS")
+    parser.add_argument('filename', nargs='?', default="evenementSAE_15.ics")
+    parser.add_argument('-o', '--output',
+                        help="fichier d'export en une passe ('-' pour la sortie standard)")
+    parser.add_argument('--columns', default=','.join(COLUMNS),
+                        help="colonnes exportées, séparées par des virgules")
+    for name in ('course', 'group', 'modality', 'teacher', 'room'):
+        parser.add_argument(f'--{name}', help=f"ne garde que les séances de ce {name}")
+    args = parser.parse_args()
+    filename = args.filename
     try:
-        # Extraire tous les événements
-        events = extract_events(filename)
-        
-        # Convertir chaque événement en format pseudo-CSV
-        for event in events:
-            pseudo_csv = format_pseudo_csv(event)
-            print(pseudo_csv)
+        if not args.output:
+            # Extraire tous les événements
+            events = extract_events(filename)
+            
+            # Convertir chaque événement en format pseudo-CSV
+            for event in events:
+                pseudo_csv = format_pseudo_csv(event)
+                print(pseudo_csv)
+            return
+
+        events = load_calendar(filename).select(course=args.course, group=args.group,
+                                                modality=args.modality, teacher=args.teacher,
+                                                room=args.room)
+        columns = [column.strip() for column in args.columns.split(',') if column.strip()]
+        if args.output == '-':
+            export_pseudo_csv(events, sys.stdout, columns)
+        else:
+            with open(args.output, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+                count = export_pseudo_csv(events, f, columns)
+            print(f"{count} séances exportées dans {args.output}")
             
     except FileNotFoundError:
         print(f"Erreur: Le fichier {filename} n'a pas été trouvé.")
@@ -1,64 +1,19 @@
-def parse_ics_datetime(dt_str):
-    """Convertit une date au format ICS en format lisible"""
-    if not dt_str:
-        return "01-01-2024", "00:00"
-    
-    try:
-        year = dt_str[0:4]
-        month = dt_str[4:6]
-        day = dt_str[6:8]
-        hour = dt_str[9:11]
-        minute = dt_str[11:13]
-        return f"{day}-{month}-{year}", f"{hour}:{minute}"
-    except IndexError:
-        return "01-01-2024", "00:00"
-
-def calculate_duration(start_dt, end_dt):
-    """Calcule la durée entre deux dates ICS"""
-    try:
-        start_minutes = int(start_dt[9:11]) * 60 + int(start_dt[11:13])
-        end_minutes = int(end_dt[9:11]) * 60 + int(end_dt[11:13])
-        duration_minutes = end_minutes - start_minutes
-        hours = duration_minutes // 60
-        minutes = duration_minutes % 60
-        return f"{hours:02d}:{minutes:02d}"
-    except (IndexError, ValueError):
-        return "00:00"
+from calendrier import calculate_duration, load_calendar, parse_ics_datetime
 
 def extract_r107_sessions(filename):
     """Extrait les séances de R1.07"""
     sessions = []
-    current_event = None
     
-    with open(filename, 'r', encoding='utf-8') as file:
-        for line in file:
-            line = line.strip()
-            if line == "BEGIN:VEVENT":
-                current_event = {}
-            elif line == "END:VEVENT":
-                if current_event:
-                    # Vérifier si c'est un événement R1.07 pour le groupe A1
-                    if "R1.07" in current_event.get('SUMMARY', '') and "A1" in current_event.get('DESCRIPTION', ''):
-                        date, heure = parse_ics_datetime(current_event.get('DTSTART', ''))
-                        duree = calculate_duration(current_event.get('DTSTART', ''), current_event.get('DTEND', ''))
-                        
-                        # Déterminer le type de séance
-                        type_seance = "CM"
-                        if "TD" in current_event.get('DESCRIPTION', ''):
-                            type_seance = "TD"
-                        elif "TP" in current_event.get('DESCRIPTION', ''):
-                            type_seance = "TP"
-                            
-                        sessions.append({
-                            'date': date,
-                            'heure': heure,
-                            'duree': duree,
-                            'type': type_seance
-                        })
-                current_event = None
-            elif current_event is not None and ':' in line:
-                key, value = line.split(':', 1)
-                current_event[key] = value
+    # Recherche dans les index du calendrier, séances par ordre chronologique
+    for event in load_calendar(filename).between(course='R1.07', group='A1'):
+        date, heure = parse_ics_datetime(event.dtstart)
+        duree = calculate_duration(event.dtstart, event.dtend)
+        sessions.append({
+            'date': date,
+            'heure': heure,
+            'duree': duree,
+            'type': event.modality
+        })
     
     return sessions
 
@@ -74,7 +29,7 @@ def main():
         print(f"{'Date':^12} | {'Heure':^8} | {'Durée':^8} | {'Type':^6}")
         print("-" * 50)
         
-        for session in sorted(sessions, key=lambda x: x['date']):
+        for session in sessions:
             print(f"{session['date']:^12} | {session['heure']:^8} | {session['duree']:^8} | {session['type']:^6}")
             
     except FileNotFoundError:
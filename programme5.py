@@ -1,69 +1,48 @@
 import markdown
 from datetime import datetime
+import argparse
+import hashlib
+import json
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
-def parse_ics_datetime(dt_str):
-    """Convertit une date au format ICS en format lisible"""
-    try:
-        year = int(dt_str[0:4])
-        month = int(dt_str[4:6])
-        day = int(dt_str[6:8])
-        hour = int(dt_str[9:11])
-        minute = int(dt_str[11:13])
-        return f"{day:02d}-{month:02d}-{year}", f"{hour:02d}:{minute:02d}"
-    except (IndexError, ValueError):
-        return "01-01-2024", "00:00"
-
-def calculate_duration(start_dt, end_dt):
-    """Calcule la durée entre deux dates ICS"""
-    try:
-        start_minutes = int(start_dt[9:11]) * 60 + int(start_dt[11:13])
-        end_minutes = int(end_dt[9:11]) * 60 + int(end_dt[11:13])
-        duration_minutes = max(0, end_minutes - start_minutes)
-        hours = duration_minutes // 60
-        minutes = duration_minutes % 60
-        return f"{hours:02d}:{minutes:02d}"
-    except (IndexError, ValueError):
-        return "00:00"
+from calendrier import (EventStore, calculate_duration, group_keys, load_calendar, month_label,
+                        month_span, parse_ics_datetime)
+from file_utils import atomic_write
+
+# Incrémenté quand la mise en forme change : tous les rapports sont alors régénérés
+RENDER_VERSION = 1
 
 def extract_r107_sessions(filename):
     """Extrait les séances de R1.07"""
+    return extract_sessions(load_calendar(filename), 'R1.07', 'A1')
+
+def extract_sessions(store: EventStore, course, group):
+    """Séances d'un cours pour un groupe, par ordre chronologique"""
+    # Recherche dans les index du calendrier
+    return session_rows(store.between(course=course, group=group))
+
+def session_rows(events):
+    """Lignes du tableau des séances pour des événements déjà sélectionnés"""
     sessions = []
-    current_event = None
     
-    with open(filename, 'r', encoding='utf-8') as file:
-        for line in file:
-            line = line.strip()
-            if line == "BEGIN:VEVENT":
-                current_event = {}
-            elif line == "END:VEVENT":
-                if current_event:
-                    if "R1.07" in current_event.get('SUMMARY', '') and "A1" in current_event.get('DESCRIPTION', ''):
-                        date, heure = parse_ics_datetime(current_event.get('DTSTART', ''))
-                        duree = calculate_duration(current_event.get('DTSTART', ''), current_event.get('DTEND', ''))
-                        
-                        type_seance = "CM"
-                        if "TD" in current_event.get('DESCRIPTION', ''):
-                            type_seance = "TD"
-                        elif "TP" in current_event.get('DESCRIPTION', ''):
-                            type_seance = "TP"
-                            
-                        sessions.append({
-                            'date': date,
-                            'heure': heure,
-                            'duree': duree,
-                            'type': type_seance
-                        })
-                current_event = None
-            elif current_event is not None and ':' in line:
-                key, value = line.split(':', 1)
-                current_event[key] = value
+    for event in events:
+        date, heure = parse_ics_datetime(event.dtstart)
+        duree = calculate_duration(event.dtstart, event.dtend)
+        sessions.append({
+            'date': date,
+            'heure': heure,
+            'duree': duree,
+            'type': event.modality
+        })
     
-    return sorted(sessions, key=lambda x: x['date'])
+    return sessions
 
-def generate_markdown_report(sessions):
+def generate_markdown_report(sessions, title="Rapport des séances R1.07",
+                             chart="sessions_r107_tp_a1.png", chart_caption="Graphique des séances de TP"):
     """Génère le rapport en format Markdown"""
-    markdown_content = """# Rapport des séances R1.07
+    markdown_content = f"""# {title}
 
 ## Tableau des séances
 
@@ -74,15 +53,15 @@ def generate_markdown_report(sessions):
     for session in sessions:
         markdown_content += f"| {session['date']} | {session['heure']} | {session['duree']} | {session['type']} |\n"
     
-    markdown_content += """
+    markdown_content += f"""
 ## Graphique des séances
 
-![Graphique des séances de TP](sessions_r107_tp_a1.png)
+![{chart_caption}]({chart})
 """
     
     return markdown_content
 
-def generate_html(markdown_content):
+def generate_html(markdown_content, title="Rapport R1.07"):
     """Génère le fichier HTML final avec style"""
     # Convertir le Markdown en HTML
     html_content = markdown.markdown(markdown_content, extensions=['tables'])
@@ -92,7 +71,7 @@ def generate_html(markdown_content):
 <html>
 <head>
     <meta charset="utf-8">
-    <title>Rapport R1.07</title>
+    <title>{title}</title>
     <style>
         body {{
             font-family: Arial, sans-serif;
@@ -131,9 +110,149 @@ def generate_html(markdown_content):
     
     return complete_html
 
+def month_range(store: EventStore):
+    """Mois couverts par le calendrier, de la première à la dernière séance"""
+    events = store.between()
+    if not events:
+        return []
+    return month_span(events[0].start, events[-1].start)
+
+def report_name(course, group):
+    return f"{course}_{group}".replace('.', '').replace(' ', '_').lower()
+
+def report_tasks(store: EventStore, output_dir):
+    """Une tâche par couple (cours, groupe) ayant des séances, avec tout ce qu'il faut pour la rendre"""
+    months = month_range(store)
+    groups = sorted({group_keys(event.group)[-1] for event in store if event.group})
+    tasks = []
+    for course in store.keys('course'):
+        for group in groups:
+            events = store.between(course=course, group=group)
+            if not events:
+                continue
+            counts = Counter((event.start.year, event.start.month) for event in events)
+            name = report_name(course, group)
+            tasks.append({
+                'course': course,
+                'group': group,
+                'sessions': session_rows(events),
+                'months': [(month_label(y, m), counts[y, m]) for y, m in months],
+                'html_path': os.path.join(output_dir, f"{name}.html"),
+                'chart_path': os.path.join(output_dir, f"{name}.png"),
+            })
+    return tasks
+
+def task_digest(task):
+    """Empreinte des données d'un rapport : inchangée, le rapport n'est pas régénéré"""
+    content = json.dumps([RENDER_VERSION, task['sessions'], task['months']], ensure_ascii=False)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+def render_chart(months, title, path):
+    """Diagramme en barres des séances par mois, sans l'état global de pyplot"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    bars = axes.bar([label for label, _ in months], [count for _, count in months])
+    axes.set_title(title)
+    axes.set_xlabel('Mois')
+    axes.set_ylabel('Nombre de séances')
+    axes.bar_label(bars)
+    axes.tick_params(axis='x', labelrotation=30)
+    figure.tight_layout()
+    figure.savefig(path)
+
+def render_report(task):
+    """Graphique et page HTML d'un couple (cours, groupe) ; exécuté dans un processus de travail"""
+    course, group = task['course'], task['group']
+    render_chart(task['months'], f"Nombre de séances {course} (Groupe {group}) par mois",
+                 task['chart_path'])
+    markdown_content = generate_markdown_report(
+        task['sessions'],
+        title=f"Rapport des séances {course} - groupe {group}",
+        chart=os.path.basename(task['chart_path']),
+        chart_caption="Graphique des séances par mois"
+    )
+    html_content = generate_html(markdown_content, title=f"Rapport {course} {group}")
+    with open(task['html_path'], 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    return task['html_path']
+
+def generate_index(tasks):
+    """Page d'accueil : un tableau cours x groupes, chaque case menant au rapport"""
+    groups = sorted({task['group'] for task in tasks})
+    reports = {(task['course'], task['group']): task for task in tasks}
+    markdown_content = "# Rapports des séances\n\n"
+    markdown_content += "| Cours | " + " | ".join(groups) + " |\n"
+    markdown_content += "|" + "------|" * (len(groups) + 1) + "\n"
+    for course in sorted({task['course'] for task in tasks}):
+        cells = []
+        for group in groups:
+            task = reports.get((course, group))
+            cells.append(f"[{len(task['sessions'])}]({os.path.basename(task['html_path'])})"
+                         if task else "")
+        markdown_content += f"| {course} | " + " | ".join(cells) + " |\n"
+    return generate_html(markdown_content, title="Rapports des séances")
+
+def generate_all_reports(filename, output_dir='rapports', workers=None, force=False):
+    """Rapports de tous les couples (cours, groupe) du calendrier, plus une page d'index.
+
+    Le calendrier est lu une fois ; les rapports sont rendus en parallèle
+    (sur place s'il n'y a qu'un processus de rendu) et seuls ceux dont les
+    séances ont changé depuis l'exécution précédente (empreintes gardées
+    dans .manifest.json) sont régénérés.
+    Renvoie le nombre de rapports régénérés.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, '.manifest.json')
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    
+    tasks = report_tasks(load_calendar(filename), output_dir)
+    digests = {task['html_path']: task_digest(task) for task in tasks}
+    stale = [task for task in tasks
+             if force or manifest.get(task['html_path']) != digests[task['html_path']]
+             or not os.path.exists(task['html_path']) or not os.path.exists(task['chart_path'])]
+    
+    # Un seul processus de rendu (un rapport périmé, un CPU ou workers=1) :
+    # rendu sur place, sans payer le démarrage d'un pool
+    workers = min(len(stale), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rendered = list(executor.map(render_report, stale))
+    else:
+        rendered = [render_report(task) for task in stale]
+    for path in rendered:
+        manifest[path] = digests[path]
+    
+    with open(os.path.join(output_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(generate_index(tasks))
+    # Les rapports disparus du calendrier sortent du manifeste
+    manifest = {path: digest for path, digest in manifest.items() if path in digests}
+    atomic_write(manifest_path, json.dumps(manifest, indent=1))
+    return len(stale)
+
 def main():
-    filename = "ADE_RT1_Septembre2023_Decembre2023.ics"  # Changement pour utiliser le fichier complet
+    parser = argparse.ArgumentParser(description="Rapports HTML des séances d'un calendrier ICS")
+    parser.add_argument('filename', nargs='?', default="ADE_RT1_Septembre2023_Decembre2023.ics")
+    parser.add_argument('--all', action='store_true',
+                        help="un rapport par cours et par groupe, plus une page d'index")
+    parser.add_argument('--output-dir', default='rapports', help="dossier des rapports (--all)")
+    parser.add_argument('--workers', type=int, default=None, help="processus de rendu (--all)")
+    parser.add_argument('--force', action='store_true', help="régénère tous les rapports (--all)")
+    args = parser.parse_args()
+    filename = args.filename  # Changement pour utiliser le fichier complet
     try:
+        if args.all:
+            count = generate_all_reports(filename, args.output_dir, args.workers, args.force)
+            print(f"{count} rapport(s) régénéré(s), index : {os.path.join(args.output_dir, 'index.html')}")
+            return
+        
         # Vérifier que le graphique existe
         if not os.path.exists("sessions_r107_tp_a1.png"):
             print("Attention: Le graphique 'sessions_r107_tp_a1.png' n'a pas été trouvé.")
@@ -0,0 +1,62 @@
+import sys
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+from capture_reader import iter_records
+from pcap_reader import is_pcap, iter_packets
+from tcpdump_parser import Packet, parse_line, time_to_micros
+
+
+@dataclass(slots=True)
+class PacketRecord:
+    """Canonical packet record shared by the threat and the pandas pipelines"""
+    source: str
+    destination: str
+    tcp_flags: str
+    size: int
+    time: int  # microseconds since midnight
+    dest_port: Optional[int] = None
+    source_port: Optional[int] = None
+    protocol: str = 'TCP'
+
+
+def record_from_packet(packet: Packet) -> PacketRecord:
+    protocol, (timestamp, source, source_port, destination, dest_port, flags, size) = packet
+    return PacketRecord(
+        source=sys.intern(source),
+        destination=sys.intern(destination),
+        tcp_flags=sys.intern(flags),
+        size=size,
+        time=time_to_micros(timestamp),
+        dest_port=dest_port,
+        source_port=source_port,
+        protocol=protocol
+    )
+
+
+def parse_record(line: str) -> Optional[PacketRecord]:
+    """Record of a tcpdump header line, None for hex dumps and non-IP lines"""
+    packet = parse_line(line)
+    return record_from_packet(packet) if packet is not None else None
+
+
+def iter_capture(filepath: str, start: int = 0, end: Optional[int] = None) -> Iterator[PacketRecord]:
+    """Records of a text capture (optionally a byte range of it) or a pcap/pcapng file"""
+    if is_pcap(filepath):
+        for packet in iter_packets(filepath):
+            yield record_from_packet(packet)
+        return
+    for line in iter_records(filepath, start, end):
+        if (packet := parse_line(line)) is not None:
+            yield record_from_packet(packet)
+
+
+def ingest(filepath: str, sinks: Iterable, start: int = 0, end: Optional[int] = None) -> int:
+    """Parse a capture once, handing every record to each sink's add_record()"""
+    adders = [sink.add_record for sink in sinks]
+    count = 0
+    for record in iter_capture(filepath, start, end):
+        count += 1
+        for add in adders:
+            add(record)
+    return count
@@ -0,0 +1,221 @@
+import io
+from collections import Counter
+from datetime import datetime
+from html import escape
+from string import Template
+from typing import Dict, Iterable, List, Sequence, TextIO, Tuple
+
+DETAIL_LIMIT = 50      # alerts rendered as full cards
+TABLE_LIMIT = 1_000    # further alerts rendered as one table row each
+FLUSH_SIZE = 64 * 1024
+
+# Templates are compiled once at import; every interpolated value goes
+# through escape() in the render functions, never into the templates raw
+HEAD = Template("""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <title>Network Security Analysis</title>
+            <style>
+                body {
+                    font-family: 'Arial', sans-serif;
+                    background: linear-gradient(135deg, #1a237e, #311b92);
+                    color: #ffffff;
+                    margin: 0;
+                    padding: 3rem;
+                }
+                h1, h2, h3 {
+                    color: #ffd700;
+                    font-weight: 800;
+                    text-shadow: 2px 2px 4px rgba(0,0,0,0.5);
+                }
+                .alert {
+                    background: rgba(255,255,255,0.1);
+                    backdrop-filter: blur(10px);
+                    border-radius: 15px;
+                    margin: 2rem 0;
+                    padding: 2.5rem;
+                    box-shadow: 0 8px 32px rgba(0,0,0,0.3);
+                }
+                .threat-level {
+                    color: #ff4081;
+                    font-size: 1.2em;
+                    letter-spacing: 2px;
+                }
+                .metrics {
+                    background: rgba(0,0,0,0.2);
+                    padding: 1.5rem;
+                    border-radius: 10px;
+                    border: 1px solid rgba(255,255,255,0.2);
+                    margin-top: 1rem;
+                }
+                table {
+                    border-collapse: collapse;
+                    background: rgba(0,0,0,0.2);
+                    margin: 1rem 0 2rem;
+                }
+                th, td {
+                    border: 1px solid rgba(255,255,255,0.2);
+                    padding: 0.4rem 0.8rem;
+                    text-align: left;
+                }
+                #charts {
+                    display: grid;
+                    grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
+                    gap: 2rem;
+                    margin: 3rem 0;
+                }
+                img {
+                    width: 100%;
+                    border-radius: 12px;
+                    box-shadow: 0 5px 15px rgba(0,0,0,0.4);
+                    transition: transform 0.3s ease;
+                }
+                img:hover {
+                    transform: scale(1.02);
+                }
+            </style>
+        </head>
+        <body>
+            <h1>Security Analysis Report</h1>
+            <p>Generated: $timestamp</p>
+
+            <div id="charts">
+                <div>
+                    <h3>TCP Flags Analysis</h3>
+                    <img src="flag_analysis.png" alt="TCP Flags">
+                </div>
+                <div>
+                    <h3>Packet Size Analysis</h3>
+                    <img src="size_analysis.png" alt="Packet Sizes">
+                </div>
+            </div>
+""")
+
+SUMMARY = Template("""
+            <h2>Summary</h2>
+            <p>$alerts alerts from $packets packets. The $details busiest sources are detailed below.</p>
+            <table>
+                <tr><th>Pattern</th><th>Sources</th><th>Packets</th></tr>$rows
+            </table>
+""")
+SUMMARY_ROW = Template("""
+                <tr><td>$pattern</td><td>$sources</td><td>$packets</td></tr>""")
+
+ALERT = Template("""
+            <div class="alert">
+                <h3>Alert Details</h3>
+                <p><b>IP:</b> $source_ip</p>$host
+                <p class="threat-level">Pattern: $pattern</p>
+                <div class="metrics">
+                    <p>Packets: $packets</p>
+                    <p>Avg Size: $size bytes</p>
+                    <p>SYN Count: $syn</p>
+                    <p>Port Count: $ports</p>
+                </div>
+            </div>
+""")
+HOST = Template("""
+                <p><b>Host:</b> $hostname</p>""")
+
+TABLE_HEAD = """
+            <h2>Other Alerts</h2>
+            <table>
+                <tr><th>IP</th><th>Host</th><th>Pattern</th><th>Packets</th><th>Avg Size</th><th>SYN</th><th>Ports</th></tr>"""
+TABLE_ROW = Template("""
+                <tr><td>$source_ip</td><td>$hostname</td><td>$pattern</td><td>$packets</td><td>$size</td><td>$syn</td><td>$ports</td></tr>""")
+TABLE_TAIL = """
+            </table>
+"""
+OMITTED = Template("""
+            <p>$count more alerts not shown ($packets packets).</p>
+""")
+TAIL = """
+        </body>
+        </html>
+        """
+
+
+def _fields(alert) -> Dict[str, str]:
+    return {
+        'source_ip': escape(alert.source_ip),
+        'hostname': escape(alert.hostname),
+        'pattern': escape(alert.behavior_pattern),
+        'packets': str(alert.total_packets),
+        'size': f"{alert.packet_size_mean:.1f}",
+        'syn': str(alert.syn_packets),
+        'ports': str(alert.targeted_ports),
+    }
+
+
+def summarize(alerts: Iterable) -> List[Tuple[str, int, int]]:
+    """(pattern, sources, packets) rows, most packets first"""
+    sources: Counter = Counter()
+    packets: Counter = Counter()
+    for alert in alerts:
+        sources[alert.behavior_pattern] += 1
+        packets[alert.behavior_pattern] += alert.total_packets
+    return sorted(((pattern, sources[pattern], packets[pattern]) for pattern in sources),
+                  key=lambda row: row[2], reverse=True)
+
+
+def render_report(out: TextIO, alerts: Sequence, detail_limit: int = DETAIL_LIMIT,
+                  table_limit: int = TABLE_LIMIT):
+    """Write the HTML security report for alerts (busiest first) to out.
+
+    Only the first detail_limit alerts get a card and the next table_limit
+    a table row; the rest are counted, so the page stays usable however
+    many sources alert. Output is buffered and flushed to out in chunks
+    rather than built as one string.
+    """
+    chunk: List[str] = []
+    size = 0
+
+    def emit(text: str):
+        nonlocal size
+        chunk.append(text)
+        size += len(text)
+        if size >= FLUSH_SIZE:
+            out.write(''.join(chunk))
+            chunk.clear()
+            size = 0
+
+    emit(HEAD.substitute(timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    rows = summarize(alerts)
+    emit(SUMMARY.substitute(
+        alerts=len(alerts),
+        packets=sum(row[2] for row in rows),
+        details=min(len(alerts), detail_limit),
+        rows=''.join(SUMMARY_ROW.substitute(pattern=escape(pattern), sources=count, packets=packets)
+                     for pattern, count, packets in rows)))
+
+    emit("""
+            <h2>Security Alerts</h2>
+""")
+    omitted = omitted_packets = 0
+    for position, alert in enumerate(alerts):
+        if position < detail_limit:
+            fields = _fields(alert)
+            host = HOST.substitute(fields) if alert.hostname != alert.source_ip else ''
+            emit(ALERT.substitute(fields, host=host))
+        elif position < detail_limit + table_limit:
+            if position == detail_limit:
+                emit(TABLE_HEAD)
+            emit(TABLE_ROW.substitute(_fields(alert)))
+        else:
+            omitted += 1
+            omitted_packets += alert.total_packets
+    if len(alerts) > detail_limit:
+        emit(TABLE_TAIL)
+    if omitted:
+        emit(OMITTED.substitute(count=omitted, packets=omitted_packets))
+    emit(TAIL)
+    out.write(''.join(chunk))
+
+
+def report_content(alerts: Sequence, **limits) -> str:
+    """The rendered report as a string"""
+    out = io.StringIO()
+    render_report(out, alerts, **limits)
+    return out.getvalue()
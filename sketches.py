@@ -0,0 +1,318 @@
+import heapq
+import math
+from collections import defaultdict
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+
+class RunningStats:
+    """Incremental count/mean/variance (Welford), mergeable across workers"""
+
+    __slots__ = ('count', 'total', 'm2', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value):
+        previous_mean = self.mean
+        self.count += 1
+        self.total += value
+        self.m2 += (value - previous_mean) * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other: 'RunningStats'):
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.total, self.m2 = other.count, other.total, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return
+        delta = other.mean - self.mean
+        count = self.count + other.count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def mean(self) -> float:
+        # Sum is kept exact so the mean does not depend on merge order
+        return self.total / self.count if self.count else 0
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class Histogram:
+    """Fixed-width bin counts; memory is bounded by the value range, not the sample count"""
+
+    def __init__(self, bin_width: int = 16):
+        self.bin_width = bin_width
+        self.counts: Dict[int, int] = defaultdict(int)
+
+    def add(self, value: int):
+        self.counts[value // self.bin_width] += 1
+
+    def merge(self, other: 'Histogram'):
+        if other.bin_width != self.bin_width:
+            raise ValueError("Cannot merge histograms with different bin widths")
+        for index, count in other.counts.items():
+            self.counts[index] += count
+
+    def bins(self) -> Tuple[List[int], List[int]]:
+        """Left edges and counts of the non-empty bins, in increasing order"""
+        indexes = sorted(self.counts)
+        return [i * self.bin_width for i in indexes], [self.counts[i] for i in indexes]
+
+    def __len__(self) -> int:
+        return sum(self.counts.values())
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch (DDSketch) with bounded relative error"""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = defaultdict(int)
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            self.buckets[math.ceil(math.log(value) / self._log_gamma)] += 1
+
+    def merge(self, other: 'QuantileSketch'):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracies")
+        for key, count in other.buckets.items():
+            self.buckets[key] += count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class Bitmap:
+    """Exact distinct counter over a small integer domain (0 <= value < size)"""
+
+    def __init__(self, size: int = 65536):
+        self.size = size
+        self.bits = bytearray((size + 7) // 8)
+        self.count = 0
+
+    def add(self, value: int):
+        byte, mask = value >> 3, 1 << (value & 7)
+        if not self.bits[byte] & mask:
+            self.bits[byte] |= mask
+            self.count += 1
+
+    def __contains__(self, value: int) -> bool:
+        return bool(self.bits[value >> 3] & (1 << (value & 7)))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def merge(self, other: 'Bitmap'):
+        if other.size != self.size:
+            raise ValueError("Cannot merge bitmaps of different sizes")
+        merged = int.from_bytes(self.bits, 'little') | int.from_bytes(other.bits, 'little')
+        self.bits = bytearray(merged.to_bytes(len(self.bits), 'little'))
+        self.count = merged.bit_count()
+
+
+class SizeDistribution:
+    """Packet length profile: running stats, fixed-bin histogram, quantiles and distinct sizes"""
+
+    def __init__(self, bin_width: int = 16, relative_accuracy: float = 0.01):
+        self.stats = RunningStats()
+        self.histogram = Histogram(bin_width)
+        self.quantiles = QuantileSketch(relative_accuracy)
+        self.distinct = Bitmap(65536)
+        # IPv6 jumbograms and reassembled pcap lengths exceed the IPv4 range
+        self.large = ExactSet()
+
+    def add(self, size: int):
+        self.stats.add(size)
+        self.histogram.add(size)
+        self.quantiles.add(size)
+        if size < self.distinct.size:
+            self.distinct.add(size)
+        else:
+            self.large.add(size)
+
+    def merge(self, other: 'SizeDistribution'):
+        self.stats.merge(other.stats)
+        self.histogram.merge(other.histogram)
+        self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+        self.large.merge(other.large)
+
+    @property
+    def distinct_sizes(self) -> int:
+        return len(self.distinct) + len(self.large)
+
+    def __len__(self) -> int:
+        return self.stats.count
+
+
+class ExactSet(set):
+    """Exact distinct counter: a set with the merge() method of the sketches"""
+
+    def merge(self, other):
+        self |= other
+
+
+def _mix64(value: int) -> int:
+    # splitmix64 finaliser: deterministic across processes, unlike hash()
+    value = (value + 0x9e3779b97f4a7c15) & 0xffffffffffffffff
+    value = ((value ^ (value >> 30)) * 0xbf58476d1ce4e5b9) & 0xffffffffffffffff
+    value = ((value ^ (value >> 27)) * 0x94d049bb133111eb) & 0xffffffffffffffff
+    return value ^ (value >> 31)
+
+
+class HyperLogLog:
+    """Cardinality estimate in 2**precision bytes (about 3% error at precision 10)"""
+
+    def __init__(self, precision: int = 10):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: int):
+        hashed = _mix64(value)
+        index = hashed >> (64 - self.precision)
+        remainder = (hashed << self.precision) & 0xffffffffffffffff
+        # Leading zeros of the remaining 64 - precision bits, plus one
+        rank = 65 - remainder.bit_length() if remainder else 65 - self.precision
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog'):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precisions")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def __len__(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+DISTINCT_COUNTERS = {
+    'exact': ExactSet,
+    'bitmap': lambda: Bitmap(65536),
+    'hll': HyperLogLog,
+}
+
+
+def distinct_counter(kind: str = 'exact'):
+    """Build an empty distinct-value counter supporting add(), len() and merge()"""
+    try:
+        return DISTINCT_COUNTERS[kind]()
+    except KeyError:
+        raise ValueError(f"Unknown distinct counter: {kind}") from None
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters: the top keys by weight in a fixed number of counters.
+
+    Counts are upper bounds; errors[key] is the maximum overestimation. The
+    min-heap is updated lazily: stale entries are refreshed when popped.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict = {}
+        self.errors: Dict = {}
+        self._heap: List = []
+
+    def add(self, key, weight: int = 1):
+        """Count key; return the key evicted to make room for it, if any"""
+        if key in self.counts:
+            self.counts[key] += weight
+            return None
+        evicted, base = None, 0
+        if len(self.counts) >= self.capacity:
+            evicted, base = self._pop_min()
+        self.counts[key] = base + weight
+        self.errors[key] = base
+        heapq.heappush(self._heap, (base + weight, key))
+        return evicted
+
+    def _pop_min(self):
+        while True:
+            count, key = heapq.heappop(self._heap)
+            current = self.counts[key]
+            if current != count:
+                heapq.heappush(self._heap, (current, key))
+                continue
+            del self.counts[key]
+            del self.errors[key]
+            return key, count
+
+    def top(self, k: Optional[int] = None) -> List[Tuple]:
+        """(key, count) pairs of the k heaviest keys, heaviest first"""
+        return heapq.nlargest(k or self.capacity, self.counts.items(), key=itemgetter(1))
+
+    def _floor(self) -> int:
+        # A full summary may have seen a key it no longer holds up to its smallest count
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other: 'SpaceSaving'):
+        """Fold in the summary of another stream; counts stay upper bounds"""
+        ours, theirs = self._floor(), other._floor()
+        for key in self.counts.keys() - other.counts.keys():
+            self.counts[key] += theirs
+            self.errors[key] += theirs
+        for key, count in other.counts.items():
+            if key in self.counts:
+                self.counts[key] += count
+                self.errors[key] += other.errors[key]
+            else:
+                self.counts[key] = count + ours
+                self.errors[key] = other.errors[key] + ours
+        if len(self.counts) > self.capacity:
+            kept = dict(self.top(self.capacity))
+            self.errors = {key: self.errors[key] for key in kept}
+            self.counts = kept
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def __contains__(self, key) -> bool:
+        return key in self.counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
@@ -0,0 +1,117 @@
+import re
+import socket
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# time, source, source port, destination, destination port, flags, length
+HeaderFields = Tuple[str, str, Optional[int], str, Optional[int], str, int]
+
+# (protocol, fields): same layout as the packets decoded by pcap_reader
+Packet = Tuple[str, HeaderFields]
+
+# One anchored pattern covering any IPv4/IPv6 header line, compiled once.
+# Flags only appear on TCP lines; some summaries (ICMP...) carry no length.
+# Groups are named so pandas can run the same pattern through str.extract.
+HEADER_RE = re.compile(
+    r'(?P<timestamp>\d\d:\d\d:\d\d\.\d+) IP6? '   # timestamp + protocol marker
+    r'(?P<src>\S+) > (?P<dst>\S+?):? '             # source > destination endpoints
+    r'(?:Flags \[(?P<flags>[^\]]*)\])?'            # TCP flags
+    r'(?:.*?length (?P<length>\d+))?'              # payload length
+)
+
+
+def time_to_micros(time: str) -> int:
+    """Convert an 'HH:MM:SS.ffffff' timestamp to microseconds since midnight"""
+    seconds = int(time[0:2]) * 3600 + int(time[3:5]) * 60 + int(time[6:8])
+    return seconds * 1_000_000 + int(time[9:15].ljust(6, '0'))
+
+
+class CaptureClock:
+    """Monotonic capture time in microseconds from time-of-day timestamps.
+
+    tcpdump prints no date, so a jump back of more than twelve hours is
+    taken as midnight wrap-around and moves the clock to the next day.
+    """
+
+    __slots__ = ('_day_offset', '_last_time')
+
+    def __init__(self):
+        self._day_offset = 0
+        self._last_time = 0
+
+    def __call__(self, micros: int) -> int:
+        if micros < self._last_time - 12 * 3600 * 1_000_000:
+            self._day_offset += 86400 * 1_000_000
+        self._last_time = micros
+        return micros + self._day_offset
+
+
+# A bare IPv4 address, possibly the tail of an IPv4-mapped IPv6 one: its last
+# component is an octet, not a port
+BARE_IPV4_RE = re.compile(r'(?:^|:)\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
+
+
+@lru_cache(maxsize=1024)
+def resolve_port(port: str, protocol: str = 'tcp') -> Optional[int]:
+    """Map a numeric port or a service name (ssh, domain...) to an int.
+
+    Names are looked up for the packet's protocol first, then for the
+    other one, so UDP-only services resolve on lines of unknown protocol.
+    """
+    if port.isdigit():
+        return int(port)
+    for proto in (protocol, 'udp' if protocol == 'tcp' else 'tcp'):
+        try:
+            return socket.getservbyname(port, proto)
+        except OSError:
+            pass
+    return None
+
+
+def split_endpoint(endpoint: str, protocol: str = 'tcp') -> Tuple[str, Optional[int]]:
+    """Split 'host.port' into (host, port).
+
+    tcpdump prints the port last, but only for protocols that have one: an
+    ICMP endpoint is a bare address or name. The last component is thus a
+    port only when it is numeric and not the last octet of an IPv4 address,
+    or when it is a known service name.
+    """
+    host, sep, port = endpoint.rpartition('.')
+    if not sep:
+        return endpoint, None
+    if port.isdigit():
+        if BARE_IPV4_RE.search(endpoint):
+            return endpoint, None
+        return host, int(port)
+    number = resolve_port(port, protocol)
+    if number is None:
+        return endpoint, None
+    return host, number
+
+
+def parse_line(line: str) -> Optional[Packet]:
+    """Extract the protocol and fields of an IP header line in a single pass"""
+    # Hex-dump continuation lines (and blank lines) never start with a digit.
+    if not line[:1].isdigit():
+        return None
+    match = HEADER_RE.match(line)
+    if match is None:
+        return None
+    time, src, dst, flags, length = match.groups()
+    if flags is not None:
+        protocol = 'TCP'
+    else:
+        protocol, flags = ('UDP' if ' UDP' in line else 'IP'), ''
+    service = 'udp' if protocol == 'UDP' else 'tcp'
+    src_host, src_port = split_endpoint(src, service)
+    dst_host, dst_port = split_endpoint(dst, service)
+    return protocol, (time, src_host, src_port, dst_host, dst_port, flags,
+                      int(length) if length else 0)
+
+
+def parse_header(line: str) -> Optional[HeaderFields]:
+    """Fields of a TCP header line; None for any other line"""
+    packet = parse_line(line)
+    if packet is None or packet[0] != 'TCP':
+        return None
+    return packet[1]
@@ -0,0 +1,65 @@
+import os
+
+import openpyxl
+import pytest
+
+import analyse
+
+CAPTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fichier1000.txt')
+
+ARP_ONLY = (
+    "18:01:29.125510 ARP, Request who-has 161.3.128.106 tell 161.3.128.184, length 46\n"
+    "18:01:29.444376 ARP, Request who-has 161.3.128.106 tell 161.3.128.183, length 46\n"
+)
+
+
+@pytest.mark.parametrize('mode', [[], ['--chunked'], ['--vectorized']])
+def test_capture_without_ip_packets_gives_empty_sheets(tmp_path, monkeypatch, mode):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'arp.txt').write_text(ARP_ONLY)
+    analyse.main(['arp.txt', '--no-charts', '--csv', '', '--excel', 'report.xlsx', *mode])
+
+    workbook = openpyxl.load_workbook(tmp_path / 'report.xlsx')
+    assert workbook.sheetnames == ['Raw Data', 'IP Analysis', 'Time Analysis']
+    assert [cell.value for cell in workbook['IP Analysis'][1]] == ['IP Address', 'Packet Count', 'Total Bytes']
+    assert all(sheet.max_row == 1 for sheet in workbook)
+
+
+def test_empty_aggregates_merge():
+    aggregates = analyse.TrafficAggregates()
+    aggregates.merge(analyse.TrafficAggregates())
+    assert len(aggregates) == 0
+    assert aggregates.ip_stats().empty
+    assert aggregates.dst_port_counts().empty
+
+
+def test_cache_hit_replays_records_into_sinks(tmp_path):
+    from packet_analyzer import TrafficMonitor
+
+    runs = []
+    for _ in range(2):
+        analyzer = analyse.NetworkAnalyzer(CAPTURE, cache_dir=str(tmp_path / 'cache'))
+        monitor = TrafficMonitor()
+        analyzer.parse_tcpdump(sinks=[monitor])
+        runs.append((analyzer.to_frame(), monitor.get_alerts(), monitor.get_metrics()))
+    assert list((tmp_path / 'cache').iterdir())
+    (fresh, fresh_alerts, fresh_metrics), (cached, cached_alerts, cached_metrics) = runs
+    assert fresh.equals(cached)
+    assert fresh_alerts == cached_alerts
+    assert fresh_metrics == cached_metrics
+
+
+@pytest.mark.parametrize('mode', ['vectorized', 'chunked'])
+def test_batched_modes_feed_the_monitor(mode):
+    from packet_analyzer import TrafficMonitor
+
+    expected = TrafficMonitor()
+    expected.analyze_log(CAPTURE)
+    analyzer = analyse.NetworkAnalyzer(CAPTURE, cache_dir=None)
+    monitor = TrafficMonitor()
+    if mode == 'chunked':
+        analyzer.analyze_traffic_chunked(batch_size=100, render=False, sinks=[monitor])
+    else:
+        analyzer.parse_tcpdump(vectorized=True, batch_size=100, sinks=[monitor])
+    assert monitor.get_alerts() == expected.get_alerts()
+    assert monitor.get_metrics() == expected.get_metrics()
@@ -0,0 +1,129 @@
+from datetime import date
+
+from calendrier import (EventStore, IntervalIndex, calculate_duration, escape, iter_events,
+                        parse_content_line, parse_ics_datetime, unescape, unfold)
+
+SAMPLE = (
+    b"BEGIN:VCALENDAR\r\n"
+    b"VERSION:2.0\r\n"
+    b"BEGIN:VEVENT\r\n"
+    b"DTSTART:20231130T070000Z\r\n"
+    b"DTEND:20231130T110000Z\r\n"
+    b"SUMMARY:R1.03 DS TP\r\n"
+    b"LOCATION:G_019\r\n"
+    b"DESCRIPTION:\\n\\nRT1-TP B1\\nCHEMINEAU CHRISTOPHE\\n(Export\xc3\xa9 le:10/01/2024 0\r\n"
+    b" 6:47)\\n\r\n"
+    b"UID:ade-1\r\n"
+    b"END:VEVENT\r\n"
+    b"BEGIN:VEVENT\r\n"
+    b"DTSTART;TZID=Europe/Paris:20231026T140000\r\n"
+    b"DTEND;TZID=Europe/Paris:20231026T160000\r\n"
+    b"SUMMARY:R1.07 TP\\; r\xc3\r\n"
+    b"\t\xa9seau\\, bases\r\n"
+    b"LOCATION:G_002\\,D_110\r\n"
+    b"DESCRIPTION:\\n\\nRT1-TP A1\\nDUPONT JEAN\\n\r\n"
+    b"UID:ade-2\r\n"
+    b"END:VEVENT\r\n"
+    b"BEGIN:VEVENT\r\n"
+    b"DTSTART:20231026T130000Z\r\n"
+    b"DTEND:20231026T150000Z\r\n"
+    b"SUMMARY:R1.07 TD\r\n"
+    b"LOCATION:D_110\r\n"
+    b"DESCRIPTION:\\n\\nRT1-TD A\\nDUPONT JEAN\\n\r\n"
+    b"UID:ade-3\r\n"
+    b"END:VEVENT\r\n"
+    b"BEGIN:VEVENT\r\n"
+    b"DTSTART:20231204T080000Z\r\n"
+    b"DTEND:20231204T100000Z\r\n"
+    b"SUMMARY:R1.07 TP\r\n"
+    b"LOCATION:G_019\r\n"
+    b"DESCRIPTION:\\n\\nRT1-TP A1\\nMARTIN ANNE\\n\r\n"
+    b"BEGIN:VALARM\r\n"
+    b"DESCRIPTION:Rappel\r\n"
+    b"END:VALARM\r\n"
+    b"UID:ade-4\r\n"
+    b"END:VEVENT\r\n"
+    b"END:VCALENDAR\r\n"
+)
+
+
+def sample_events(tmp_path):
+    path = tmp_path / 'sample.ics'
+    path.write_bytes(SAMPLE)
+    return list(iter_events(str(path)))
+
+
+def test_unfold_joins_continuation_lines():
+    lines = [b'DESCRIPTION:a 0\r\n', b' 6:47\r\n', b'\tb\r\n', b'UID:x\r\n']
+    assert list(unfold(lines)) == ['DESCRIPTION:a 06:47b', 'UID:x']
+
+
+def test_folded_description_keeps_group_and_teacher(tmp_path):
+    event = sample_events(tmp_path)[0]
+    assert event.description == '\n\nRT1-TP B1\nCHEMINEAU CHRISTOPHE\n(Exporté le:10/01/2024 06:47)\n'
+    assert event.group == 'RT1-TP B1'
+    assert event.teachers == ('CHEMINEAU CHRISTOPHE',)
+    assert (event.course, event.modality) == ('R1.03', 'TP')
+
+
+def test_fold_inside_a_utf8_character(tmp_path):
+    assert sample_events(tmp_path)[1].summary == 'R1.07 TP; réseau, bases'
+
+
+def test_parameters_and_tzid(tmp_path):
+    utc, paris = sample_events(tmp_path)[:2]
+    assert paris.tzid == 'Europe/Paris'
+    assert (paris.start.hour, paris.end.hour) == (14, 16)
+    # UTC value shown at local (winter) time
+    assert utc.tzid == '' and utc.start.hour == 8
+    assert parse_content_line('ATTENDEE;CN="Doe: John";ROLE=CHAIR:mailto:j@x.org') == (
+        'ATTENDEE', {'CN': 'Doe: John', 'ROLE': 'CHAIR'}, 'mailto:j@x.org')
+
+
+def test_text_unescaping(tmp_path):
+    event = sample_events(tmp_path)[1]
+    assert event.rooms == ['G_002', 'D_110']
+    assert unescape(r'a\,b\;c\nd\\e\N') == 'a,b;c\nd\\e\n'
+    assert unescape(escape('a,b;c\nd\\e')) == 'a,b;c\nd\\e'
+    assert event.properties()['LOCATION'] == r'G_002\,D_110'
+
+
+def test_nested_components_are_ignored(tmp_path):
+    event = sample_events(tmp_path)[3]
+    assert event.description == '\n\nRT1-TP A1\nMARTIN ANNE\n'
+    assert event.uid == 'ade-4'
+
+
+def test_interval_index_overlapping():
+    index = IntervalIndex([(0, 100, 0), (10, 20, 1), (30, 40, 2), (50, 60, 3)])
+    assert index.overlapping(35, 55) == [0, 2, 3]
+    # Intervals are half-open: touching ends do not overlap
+    assert index.overlapping(20, 30) == [0]
+    assert index.overlapping(100, 200) == []
+
+
+def test_between_by_course_group_and_dates(tmp_path):
+    store = EventStore(sample_events(tmp_path))
+    october = store.between(date(2023, 10, 1), date(2023, 11, 1), course='R1.07', group='A1')
+    assert [event.uid for event in october] == ['ade-2']
+    # Chronological order, not file order
+    assert [event.uid for event in store.between(course='R1.07')] == ['ade-2', 'ade-3', 'ade-4']
+    assert list(store.by_period('month', course='R1.07')) == ['2023-10', '2023-12']
+
+
+def test_room_and_teacher_conflicts(tmp_path):
+    store = EventStore(sample_events(tmp_path))
+    assert [(key, a.uid, b.uid) for key, a, b in store.conflicts('room')] == [('D_110', 'ade-2', 'ade-3')]
+    assert [(key, a.uid, b.uid) for key, a, b in store.conflicts('teacher')] == [
+        ('DUPONT JEAN', 'ade-2', 'ade-3')]
+    paris = store.events[1]
+    assert [event.uid for event in store.conflicts_with(paris)] == ['ade-3']
+    # Same rooms, no common time slot
+    assert store.conflicts_with(store.events[0]) == []
+
+
+def test_local_time_helpers():
+    assert parse_ics_datetime('20231026T120000Z') == ('26-10-2023', '14:00')
+    assert parse_ics_datetime('') == ('01-01-2024', '00:00')
+    # Across midnight and the end of daylight saving time
+    assert calculate_duration('20231028T230000Z', '20231029T030000Z') == '04:00'
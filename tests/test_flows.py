@@ -0,0 +1,74 @@
+from flows import CLOSED, ESTABLISHED, EXPIRED, HALF_OPEN, REJECTED, FlowTable
+from records import PacketRecord
+
+CLIENT = '10.0.0.1'
+SERVER = '10.0.0.2'
+
+
+def packet(seconds: float, flags: str, outbound: bool = True, client: str = CLIENT,
+           port: int = 40000, service: int = 80) -> PacketRecord:
+    time = int(seconds * 1_000_000)
+    if outbound:
+        return PacketRecord(client, SERVER, flags, 0, time, service, port)
+    return PacketRecord(SERVER, client, flags, 0, time, port, service)
+
+
+def feed(table: FlowTable, *packets: PacketRecord) -> FlowTable:
+    for record in packets:
+        table.add(record)
+    return table
+
+
+def test_three_way_handshake_establishes():
+    table = feed(FlowTable(), packet(0, 'S'), packet(0.1, 'S.', False), packet(0.2, '.'))
+    (flow,) = table.flows.values()
+    assert flow.state == ESTABLISHED
+    assert flow.initiator == (CLIENT, 40000)
+    assert (flow.packets_out, flow.packets_in) == (2, 1)
+
+
+def test_rst_answering_syn_is_rejected():
+    table = feed(FlowTable(), packet(0, 'S'), packet(0.1, 'R.', False))
+    assert len(table) == 0
+    assert table.outcomes[REJECTED] == 1
+    assert table.failed_by_source() == {CLIENT: 1}
+
+
+def test_unanswered_syn_expires_half_open():
+    table = feed(FlowTable(idle_timeout=120), packet(0, 'S'))
+    assert table.failed_by_source() == {CLIENT: 1}
+    # Any later packet sweeps the idle flow
+    feed(table, packet(121, '.', client='10.0.0.9'))
+    assert table.outcomes[HALF_OPEN] == 1
+    assert table.failed_by_source() == {CLIENT: 1}
+
+
+def test_both_fins_close():
+    table = feed(FlowTable(), packet(0, 'S'), packet(0.1, 'S.', False), packet(0.2, '.'),
+                 packet(1, 'F.'), packet(1.1, 'F.', False))
+    assert len(table) == 0
+    assert table.outcomes[CLOSED] == 1
+
+
+def test_scanners_and_lru_eviction():
+    table = FlowTable(max_flows=5, scan_threshold=10)
+    feed(table, *(packet(i / 100, 'S', service=1000 + i) for i in range(12)))
+    # The oldest probes were evicted but still count as failed handshakes
+    assert len(table) == 5
+    assert table.outcomes[HALF_OPEN] == 7
+    assert table.scanners() == {CLIENT: 12}
+
+
+def test_merge_chunk_tables():
+    first = feed(FlowTable(), packet(180, 'S'), packet(190, 'S', client='10.0.0.3'))
+    second = feed(FlowTable(), packet(1, 'S.', False), packet(2, '.'),
+                  packet(5, '.', client='10.0.0.4'), packet(100, '.', client='10.0.0.5'))
+    first.merge(second)
+    # The handshake split across both chunks is combined
+    flow = next(flow for flow in first.flows.values() if flow.initiator[0] == CLIENT)
+    assert flow.state == ESTABLISHED
+    assert (flow.packets_out, flow.packets_in) == (2, 1)
+    # A flow idle past the timeout expires even when it only came from the other chunk
+    assert sorted(flow.initiator[0] for flow in first.flows.values()) == [CLIENT, '10.0.0.3', '10.0.0.5']
+    assert first.outcomes[EXPIRED] == 1
+    assert list(first.flows) == sorted(first.flows, key=lambda key: first.flows[key].last_seen)
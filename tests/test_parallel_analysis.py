@@ -0,0 +1,62 @@
+from packet_analyzer import TrafficMonitor, window_config
+
+
+def stamp(seconds: float) -> str:
+    whole = int(seconds)
+    return (f"{10 + whole // 3600:02d}:{whole // 60 % 60:02d}:{whole % 60:02d}"
+            f".{int(round((seconds - whole) * 1_000_000)):06d}")
+
+
+def syn(seconds: float, source: str, port: int) -> str:
+    return (f"{stamp(seconds)} IP {source}.40000 > 10.0.0.2.{port}: "
+            f"Flags [S], seq 1, win 1024, length 0\n")
+
+
+def ack(seconds: float) -> str:
+    return (f"{stamp(seconds)} IP 10.0.0.1.50000 > 10.0.0.2.443: "
+            f"Flags [.], ack 1, win 512, length 0\n")
+
+
+def write_capture(path) -> None:
+    """30 minutes of background traffic with a slow scan throughout and a
+    40-port burst in the middle of the file, where the chunks split"""
+    lines = []
+    for second in range(900):
+        lines.append(ack(second))
+        if second % 60 == 0:
+            lines.append(syn(second + 0.5, '10.8.8.8', 2000 + second // 60))
+    for i in range(40):
+        lines.append(syn(900 + i / 50, '10.9.9.9', 1000 + i))
+    for second in range(901, 1801):
+        lines.append(ack(second))
+        if second % 60 == 0:
+            lines.append(syn(second + 0.5, '10.8.8.8', 2000 + second // 60))
+    path.write_text(''.join(lines))
+
+
+def alerts(path, workers: int, config=None):
+    monitor = TrafficMonitor(window_config=config)
+    monitor.analyze_log(str(path), workers)
+    return monitor.get_alerts()
+
+
+def test_parallel_windows_match_sequential(tmp_path):
+    path = tmp_path / 'capture.txt'
+    write_capture(path)
+    sequential = alerts(path, 1)
+    patterns = {alert.source_ip: alert.behavior_pattern for alert in sequential}
+    assert 'Burst Scan' in patterns['10.9.9.9']
+    assert 'Slow Scan' in patterns['10.8.8.8']
+    assert alerts(path, 4) == sequential
+
+
+def test_window_config_reaches_chunk_workers(tmp_path):
+    path = tmp_path / 'capture.txt'
+    write_capture(path)
+    # A one-minute long window never holds the slow scan's 20 ports
+    config = window_config(10, 60)
+    sequential = alerts(path, 1, config)
+    patterns = {alert.source_ip: alert.behavior_pattern for alert in sequential}
+    assert 'Burst Scan' in patterns['10.9.9.9']
+    assert 'Slow Scan' not in patterns['10.8.8.8']
+    assert alerts(path, 4, config) == sequential
@@ -0,0 +1,165 @@
+import socket
+import struct
+from datetime import datetime
+
+import pytest
+
+from pcap_reader import is_pcap, iter_packets
+from records import iter_capture, parse_record
+from tcpdump_parser import parse_line
+
+# 2023-10-02 11:42:04 UTC plus a sub-second part, in the fixtures' native resolution
+SECONDS = 1696246924
+MICROS = 766656
+NANOS = 766656789
+
+
+def local_time(seconds: int, micros: int) -> str:
+    # tcpdump and the pcap reader both print local time
+    return f"{datetime.fromtimestamp(seconds).strftime('%H:%M:%S')}.{micros:06d}"
+
+
+def tcp_segment(sport: int, dport: int, flags: int, payload_size: int) -> bytes:
+    header = struct.pack('!HHIIBBHHH', sport, dport, 1, 0, 5 << 4, flags, 512, 0, 0)
+    return header + bytes(payload_size)
+
+
+def udp_datagram(sport: int, dport: int, payload_size: int) -> bytes:
+    return struct.pack('!HHHH', sport, dport, 8 + payload_size, 0) + bytes(payload_size)
+
+
+def ipv4(src: str, dst: str, proto: int, segment: bytes) -> bytes:
+    return struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(segment), 0, 0, 64, proto, 0,
+                       socket.inet_aton(src), socket.inet_aton(dst)) + segment
+
+
+def ipv6(src: str, dst: str, proto: int, segment: bytes, hop_by_hop: bool = False) -> bytes:
+    next_header = proto
+    if hop_by_hop:
+        # Hop-by-hop options header: 8 bytes, padded with PadN
+        segment = struct.pack('!BB', proto, 0) + b'\x01\x04\x00\x00\x00\x00' + segment
+        next_header = 0
+    return (struct.pack('!IHBB', 6 << 28, len(segment), next_header, 64)
+            + socket.inet_pton(socket.AF_INET6, src)
+            + socket.inet_pton(socket.AF_INET6, dst) + segment)
+
+
+def ethernet(ethertype: int, packet: bytes, vlan: int = None) -> bytes:
+    header = bytes(6) + b'\x02' + bytes(5)
+    if vlan is not None:
+        header += struct.pack('!HH', 0x8100, vlan)
+    return header + struct.pack('!H', ethertype) + packet
+
+
+def linux_sll(ethertype: int, packet: bytes) -> bytes:
+    return struct.pack('!HHH8sH', 0, 1, 6, bytes(8), ethertype) + packet
+
+
+def pcap(endian: str, nanosecond: bool, linktype: int, frames, snaplen: int = 65535) -> bytes:
+    magic = 0xa1b23c4d if nanosecond else 0xa1b2c3d4
+    fraction = NANOS if nanosecond else MICROS
+    data = struct.pack(endian + 'IHHiIII', magic, 2, 4, 0, 0, snaplen, linktype)
+    for frame in frames:
+        captured = frame[:snaplen]
+        data += struct.pack(endian + 'IIII', SECONDS, fraction, len(captured), len(frame))
+        data += captured
+    return data
+
+
+def pcapng_block(endian: str, block_type: int, body: bytes) -> bytes:
+    body += bytes(-len(body) % 4)
+    length = 12 + len(body)
+    return struct.pack(endian + 'II', block_type, length) + body + struct.pack(endian + 'I', length)
+
+
+def pcapng(endian: str, linktype: int, frames, tsresol: int = None) -> bytes:
+    section = struct.pack(endian + 'IHHq', 0x1a2b3c4d, 1, 0, -1)
+    options = b''
+    if tsresol is not None:
+        options = struct.pack(endian + 'HHB3x', 9, 1, tsresol) + struct.pack(endian + 'HH', 0, 0)
+    data = (pcapng_block(endian, 0x0a0d0d0a, section)
+            + pcapng_block(endian, 1, struct.pack(endian + 'HHI', linktype, 0, 65535) + options))
+    units = 10 ** (tsresol or 6)
+    stamp = SECONDS * units + (NANOS if tsresol == 9 else MICROS)
+    for frame in frames:
+        data += pcapng_block(endian, 6, struct.pack(endian + 'IIIII', 0, stamp >> 32,
+                                                   stamp & 0xffffffff, len(frame), len(frame)) + frame)
+    return data
+
+
+TCP_SYN = 0x02
+TCP_PSH_ACK = 0x18
+
+# Each fixture: capture bytes and the tcpdump lines printing the same packets
+CAPTURES = {
+    'pcap-le-usec-ethernet-snaplen': (
+        pcap('<', False, 1, [
+            ethernet(0x0800, ipv4('192.168.1.10', '192.168.1.20', 6,
+                                  tcp_segment(50019, 22, TCP_SYN, 0))),
+            ethernet(0x0800, ipv4('192.168.1.20', '192.168.1.10', 6,
+                                  tcp_segment(22, 50019, TCP_PSH_ACK, 1000))),
+        ], snaplen=96),
+        ['{t} IP 192.168.1.10.50019 > 192.168.1.20.22: Flags [S], seq 1, win 512, length 0',
+         '{t} IP 192.168.1.20.22 > 192.168.1.10.50019: Flags [P.], seq 1:1001, win 512, length 1000'],
+    ),
+    'pcap-be-nsec-vlan': (
+        pcap('>', True, 1, [
+            ethernet(0x0800, ipv4('10.0.0.1', '10.0.0.2', 17, udp_datagram(53, 4000, 64)), vlan=100),
+        ]),
+        ['{t} IP 10.0.0.1.53 > 10.0.0.2.4000: UDP, length 64'],
+    ),
+    'pcap-le-sll-ipv6': (
+        pcap('<', False, 113, [
+            linux_sll(0x86dd, ipv6('2001:db8::1', '2001:db8::2', 6,
+                                   tcp_segment(443, 51000, TCP_PSH_ACK, 200), hop_by_hop=True)),
+        ]),
+        ['{t} IP6 2001:db8::1.443 > 2001:db8::2.51000: Flags [P.], seq 1:201, win 512, length 200'],
+    ),
+    'pcapng-le-nsec-ethernet': (
+        pcapng('<', 1, [
+            ethernet(0x0800, ipv4('192.168.1.10', '192.168.1.20', 6,
+                                  tcp_segment(50020, 80, TCP_SYN, 0))),
+        ], tsresol=9),
+        ['{t} IP 192.168.1.10.50020 > 192.168.1.20.80: Flags [S], seq 1, win 512, length 0'],
+    ),
+    'pcapng-be-usec-ipv6-vlan': (
+        pcapng('>', 1, [
+            ethernet(0x86dd, ipv6('fe80::1', 'ff02::1:2', 17, udp_datagram(546, 547, 40)), vlan=7),
+        ]),
+        ['{t} IP6 fe80::1.546 > ff02::1:2.547: UDP, length 40'],
+    ),
+}
+
+
+@pytest.fixture(params=sorted(CAPTURES))
+def capture(request, tmp_path):
+    content, lines = CAPTURES[request.param]
+    path = tmp_path / f"{request.param}.cap"
+    path.write_bytes(content)
+    stamp = local_time(SECONDS, MICROS)
+    return str(path), [line.format(t=stamp) for line in lines]
+
+
+def test_decoded_packets_match_text_parser(capture):
+    path, lines = capture
+    assert is_pcap(path)
+    assert list(iter_packets(path)) == [parse_line(line) for line in lines]
+
+
+def test_records_match_text_records(capture):
+    path, lines = capture
+    assert list(iter_capture(path)) == [parse_record(line) for line in lines]
+
+
+def test_snaplen_keeps_segment_length(tmp_path):
+    path = tmp_path / 'snap.pcap'
+    frame = ethernet(0x0800, ipv4('10.0.0.1', '10.0.0.2', 6, tcp_segment(1, 2, TCP_PSH_ACK, 1000)))
+    path.write_bytes(pcap('<', False, 1, [frame], snaplen=68))
+    (packet,) = iter_packets(str(path))
+    assert packet[1][6] == 1000
+
+
+def test_text_capture_is_not_pcap(tmp_path):
+    path = tmp_path / 'capture.txt'
+    path.write_text('11:42:04.766656 IP 10.0.0.1.1 > 10.0.0.2.2: Flags [S], length 0\n')
+    assert not is_pcap(str(path))
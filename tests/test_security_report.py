@@ -0,0 +1,26 @@
+from packet_analyzer import SecurityAlert
+from security_report import report_content
+
+
+def alert(source_ip: str, hostname: str, pattern: str = 'Burst Scan', packets: int = 10) -> SecurityAlert:
+    return SecurityAlert(source_ip=source_ip, hostname=hostname, total_packets=packets,
+                         packet_size_mean=60.0, syn_packets=packets, targeted_ports=40,
+                         behavior_pattern=pattern, related_ips={source_ip})
+
+
+def test_capture_fields_are_escaped():
+    hostile = alert('10.0.0.1', '<script>alert(1)</script>.example', pattern='<b>Scan</b> & "x"')
+    # The second alert lands in the table rather than a card
+    rows = [hostile, alert('10.0.0.2', '<img src=x onerror=1>', packets=5)]
+    html = report_content(rows, detail_limit=1)
+    assert '<script>' not in html and '<img src=x' not in html and '<b>Scan' not in html
+    assert '&lt;script&gt;alert(1)&lt;/script&gt;.example' in html
+    assert '&lt;img src=x onerror=1&gt;' in html
+    assert '&lt;b&gt;Scan&lt;/b&gt; &amp; &quot;x&quot;' in html
+
+
+def test_report_is_capped():
+    alerts = [alert(f'10.0.0.{i}', f'10.0.0.{i}', packets=100 - i) for i in range(10)]
+    html = report_content(alerts, detail_limit=2, table_limit=3)
+    assert html.count('class="alert"') == 2
+    assert '5 more alerts not shown' in html
@@ -0,0 +1,110 @@
+import random
+from collections import Counter
+
+import pytest
+
+from sketches import HyperLogLog, SizeDistribution, SpaceSaving
+
+
+def test_size_distribution_counts_sizes_beyond_65535():
+    sizes = SizeDistribution()
+    for size in (0, 60, 60, 1500, 65535, 70000, 70000, 1_000_000):
+        sizes.add(size)
+    assert len(sizes) == 8
+    assert sizes.distinct_sizes == 6
+    assert sizes.stats.maximum == 1_000_000
+
+
+def test_size_distribution_merge_keeps_large_sizes():
+    first, second = SizeDistribution(), SizeDistribution()
+    first.add(70000)
+    second.add(70000)
+    second.add(80000)
+    second.add(40)
+    first.merge(second)
+    assert first.distinct_sizes == 3
+
+
+def hll_of(values, precision: int = 10) -> HyperLogLog:
+    sketch = HyperLogLog(precision)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+@pytest.mark.parametrize('cardinality', [50, 1_000, 20_000, 200_000])
+def test_hyperloglog_relative_error(cardinality):
+    sketch = hll_of(range(cardinality))
+    # Standard error 1.04 / sqrt(1024) is about 3.3%; allow three of them
+    assert abs(len(sketch) - cardinality) / cardinality < 0.1
+    # Duplicates do not move the estimate
+    for value in range(0, cardinality, 7):
+        sketch.add(value)
+    assert abs(len(sketch) - cardinality) / cardinality < 0.1
+
+
+def test_hyperloglog_merge_matches_concatenated_stream():
+    first, second = hll_of(range(0, 30_000)), hll_of(range(20_000, 50_000))
+    first.merge(second)
+    assert first.registers == hll_of(range(50_000)).registers
+    with pytest.raises(ValueError):
+        first.merge(HyperLogLog(12))
+
+
+def heavy_stream(seed: int, length: int = 20_000):
+    """Five heavy keys (4% to 12% of the stream each) among mostly distinct noise"""
+    rng = random.Random(seed)
+    heavy = {f'heavy{i}': 0.04 + 0.02 * i for i in range(5)}
+    stream = []
+    for _ in range(length):
+        pick = rng.random()
+        for key, share in heavy.items():
+            pick -= share
+            if pick < 0:
+                stream.append(key)
+                break
+        else:
+            stream.append(f'noise{rng.randrange(100_000)}')
+    return stream
+
+
+def spacesaving_of(stream, capacity: int) -> SpaceSaving:
+    sketch = SpaceSaving(capacity)
+    for key in stream:
+        sketch.add(key)
+    return sketch
+
+
+def assert_guarantees(sketch: SpaceSaving, stream):
+    truth = Counter(stream)
+    for key, count in sketch.counts.items():
+        # Counts are upper bounds, off by at most errors[key]
+        assert truth[key] <= count <= truth[key] + sketch.errors[key]
+    # Every key above len(stream) / capacity is kept
+    for key, count in truth.items():
+        if count > len(stream) / sketch.capacity:
+            assert key in sketch
+
+
+def test_spacesaving_keeps_guaranteed_heavy_hitters():
+    stream = heavy_stream(1)
+    sketch = spacesaving_of(stream, 50)
+    assert_guarantees(sketch, stream)
+    assert [key for key, _ in sketch.top(5)] == [f'heavy{i}' for i in reversed(range(5))]
+
+
+def test_spacesaving_merge_matches_concatenated_stream():
+    first, second = heavy_stream(2), heavy_stream(3)
+    # A key evicted from the first chunk's summary, counted exactly in the second
+    first[5::300] = ['late'] * len(first[5::300])
+    second = ['late'] * 1_500 + second
+    merged = spacesaving_of(first, 50)
+    merged.merge(spacesaving_of(second, 50))
+    single = spacesaving_of(first + second, 50)
+    assert_guarantees(merged, first + second)
+    assert [key for key, _ in merged.top(6)] == [key for key, _ in single.top(6)]
+    # With room for every key both are exact
+    small = ['a', 'b', 'a', 'c', 'a', 'b']
+    exact = spacesaving_of(small[:3], 10)
+    exact.merge(spacesaving_of(small[3:], 10))
+    assert exact.counts == spacesaving_of(small, 10).counts == Counter(small)
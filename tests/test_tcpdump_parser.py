@@ -0,0 +1,94 @@
+import pytest
+
+from records import parse_record
+from tcpdump_parser import (CaptureClock, parse_header, parse_line, resolve_port, split_endpoint,
+                            time_to_micros)
+
+TCP_LINE = ('11:42:04.766656 IP BP-Linux8.ssh > 192.168.190.130.50019: Flags [P.], '
+            'seq 2243505564:2243505672, ack 1972915080, win 312, length 108')
+UDP_LINE = '11:42:05.000001 IP 10.0.0.1.53 > 10.0.0.2.4000: UDP, length 64'
+ICMP_LINE = ('11:42:05.000002 IP 10.0.0.1 > 10.0.0.2: ICMP echo request, '
+             'id 1, seq 1, length 64')
+DNS_LINE = '11:42:06.679262 IP BP-Linux8.53220 > ns1.lan.rt.domain: 54801+ A? lacampora.org. (31)'
+
+
+def test_time_to_micros():
+    assert time_to_micros('11:42:04.766656') == (11 * 3600 + 42 * 60 + 4) * 1_000_000 + 766656
+    assert time_to_micros('00:00:01.5') == 1_500_000
+
+
+@pytest.mark.parametrize('endpoint, expected', [
+    ('192.168.190.130.50019', ('192.168.190.130', 50019)),
+    ('10.0.0.1', ('10.0.0.1', None)),
+    ('BP-Linux8.53220', ('BP-Linux8', 53220)),
+    ('BP-Linux8.ssh', ('BP-Linux8', 22)),
+    ('ns1.lan.rt.domain', ('ns1.lan.rt', 53)),
+    ('ns1.lan.rt', ('ns1.lan.rt', None)),
+    ('fe80::1.546', ('fe80::1', 546)),
+    ('fe80::1', ('fe80::1', None)),
+    ('::ffff:10.0.0.1', ('::ffff:10.0.0.1', None)),
+    ('::ffff:10.0.0.1.80', ('::ffff:10.0.0.1', 80)),
+])
+def test_split_endpoint(endpoint, expected):
+    assert split_endpoint(endpoint) == expected
+
+
+def test_resolve_port_falls_back_to_udp_services():
+    assert resolve_port('443') == 443
+    assert resolve_port('domain', 'udp') == 53
+    assert resolve_port('ntp') == 123
+    assert resolve_port('no-such-service') is None
+
+
+def test_parse_tcp_line():
+    assert parse_line(TCP_LINE) == ('TCP', ('11:42:04.766656', 'BP-Linux8', 22,
+                                            '192.168.190.130', 50019, 'P.', 108))
+    assert parse_header(TCP_LINE) == parse_line(TCP_LINE)[1]
+
+
+def test_parse_udp_line():
+    protocol, fields = parse_line(UDP_LINE)
+    assert protocol == 'UDP'
+    assert fields == ('11:42:05.000001', '10.0.0.1', 53, '10.0.0.2', 4000, '', 64)
+    assert parse_header(UDP_LINE) is None
+
+
+def test_icmp_endpoints_have_no_port():
+    record = parse_record(ICMP_LINE)
+    assert (record.protocol, record.source, record.source_port) == ('IP', '10.0.0.1', None)
+    assert (record.destination, record.dest_port) == ('10.0.0.2', None)
+    assert record.size == 64
+
+
+def test_named_endpoints():
+    record = parse_record(DNS_LINE)
+    assert (record.source, record.source_port) == ('BP-Linux8', 53220)
+    assert (record.destination, record.dest_port) == ('ns1.lan.rt', 53)
+    assert record.size == 0
+
+
+@pytest.mark.parametrize('line', [
+    '',
+    '\t0x0000:  4512 00a0 ed8e 4000 4006 99c5 c0a8 731e',
+    '11:42:05.000000 ARP, Request who-has 10.0.0.2 tell 10.0.0.1, length 28',
+])
+def test_non_ip_lines(line):
+    assert parse_line(line) is None
+
+
+def test_vectorized_extraction_matches_records():
+    analyse = pytest.importorskip('analyse')
+    lines = [TCP_LINE, UDP_LINE, ICMP_LINE, DNS_LINE]
+    vectorized = analyse.extract_frame(lines)
+    records = analyse.records_frame([parse_record(line) for line in lines])
+    for column in analyse.COLUMNS:
+        assert list(vectorized[column]) == list(records[column]), column
+
+
+def test_capture_clock_wraps_at_midnight():
+    clock = CaptureClock()
+    late = time_to_micros('23:59:59.500000')
+    assert clock(late) == late
+    assert clock(time_to_micros('00:00:00.250000')) == 86400 * 1_000_000 + 250_000
+    # Small reorderings are not a new day
+    assert clock(time_to_micros('00:00:00.100000')) == 86400 * 1_000_000 + 100_000
@@ -0,0 +1,36 @@
+from window_detector import BURST_SCAN, WindowedDetector
+
+
+def burst(detector: WindowedDetector, source: str = '10.9.9.9'):
+    for port in range(40):
+        detector.add(source, 3_600_000_000 + port * 10_000, 1000 + port)
+
+
+def test_burst_scan():
+    detector = WindowedDetector()
+    burst(detector)
+    assert detector.snapshot()['10.9.9.9'].patterns == [BURST_SCAN]
+
+
+def test_idle_time_ages_out_alerts():
+    detector = WindowedDetector()
+    burst(detector)
+    since = detector.latest
+    detector.expire_idle(since, 30.5)
+    stats = detector.snapshot()['10.9.9.9']
+    assert stats.short_syn == 0 and BURST_SCAN not in stats.patterns
+    detector.expire_idle(since, detector.margin)
+    assert detector.snapshot() == {}
+
+
+def test_records_delivered_after_idle_keep_their_window():
+    detector = WindowedDetector()
+    detector.add('10.8.8.8', 3_600_000_000, 22)
+    since = detector.latest
+    detector.expire_idle(since, 30)
+    assert detector.snapshot()['10.8.8.8'].short_syn == 0
+    # tcpdump flushes a burst captured 5 s after the last record
+    for port in range(40):
+        detector.add('10.9.9.9', 3_605_000_000 + port * 10_000, 1000 + port)
+    stats = detector.snapshot()['10.9.9.9']
+    assert stats.short_syn == 40 and stats.patterns == [BURST_SCAN]
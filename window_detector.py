@@ -0,0 +1,267 @@
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from tcpdump_parser import CaptureClock
+
+BURST_SCAN = "Burst Scan"
+SLOW_SCAN = "Slow Scan"
+SYN_FLOOD = "SYN Flood"
+
+
+@dataclass
+class WindowConfig:
+    bucket_seconds: int
+    buckets: int
+
+    @property
+    def seconds(self) -> int:
+        return self.bucket_seconds * self.buckets
+
+
+@dataclass
+class DetectionConfig:
+    short: WindowConfig = field(default_factory=lambda: WindowConfig(1, 10))
+    long: WindowConfig = field(default_factory=lambda: WindowConfig(60, 60))
+    flood_syn_rate: float = 100.0   # SYN/s over the short window
+    flood_max_ports: int = 4        # a flood hammers few ports, a scan many
+    burst_ports: int = 20           # distinct ports within the short window
+    slow_ports: int = 20            # distinct ports within the long window
+    max_sources: int = 10_000       # least recently seen sources are evicted
+
+
+@dataclass
+class WindowStats:
+    short_syn: int
+    short_rate: float
+    short_ports: int
+    long_syn: int
+    long_ports: int
+    patterns: List[str]
+
+
+class RingWindow:
+    """SYN count and distinct destination ports over a sliding bucketed window.
+
+    Each slot holds one time bucket; a per-port reference count across live
+    slots gives the distinct-port total without rescanning the window, so an
+    update costs O(1) amortised and memory is fixed by the bucket count.
+    """
+
+    __slots__ = ('bucket_seconds', 'size', 'ids', 'syn', 'ports',
+                 'port_refs', 'syn_total', 'head')
+
+    def __init__(self, config: WindowConfig):
+        self.bucket_seconds = config.bucket_seconds
+        self.size = config.buckets
+        self.ids = [-1] * self.size
+        self.syn = [0] * self.size
+        self.ports: List[Optional[set]] = [None] * self.size
+        self.port_refs: Dict[int, int] = {}
+        self.syn_total = 0
+        self.head = -1
+
+    def _clear(self, slot: int):
+        self.syn_total -= self.syn[slot]
+        self.syn[slot] = 0
+        ports = self.ports[slot]
+        if ports:
+            for port in ports:
+                refs = self.port_refs[port] - 1
+                if refs:
+                    self.port_refs[port] = refs
+                else:
+                    del self.port_refs[port]
+        self.ports[slot] = None
+
+    def advance(self, seconds: int):
+        bucket = seconds // self.bucket_seconds
+        if bucket <= self.head:
+            return
+        for b in range(max(self.head + 1, bucket - self.size + 1), bucket + 1):
+            slot = b % self.size
+            if self.ids[slot] != b:
+                self._clear(slot)
+                self.ids[slot] = b
+        self.head = bucket
+
+    def add(self, seconds: int, port: Optional[int]):
+        self.advance(seconds)
+        bucket = seconds // self.bucket_seconds
+        slot = bucket % self.size
+        if self.ids[slot] != bucket:
+            return  # late packet older than the window
+        self.syn[slot] += 1
+        self.syn_total += 1
+        if port is not None:
+            ports = self.ports[slot]
+            if ports is None:
+                ports = self.ports[slot] = set()
+            if port not in ports:
+                ports.add(port)
+                self.port_refs[port] = self.port_refs.get(port, 0) + 1
+
+    @property
+    def rate(self) -> float:
+        return self.syn_total / (self.bucket_seconds * self.size)
+
+    @property
+    def distinct_ports(self) -> int:
+        return len(self.port_refs)
+
+    def view(self, seconds: int) -> Tuple[int, int]:
+        """(SYN count, distinct ports) the window would hold at seconds, left unadvanced"""
+        bucket = seconds // self.bucket_seconds
+        if bucket <= self.head:
+            return self.syn_total, self.distinct_ports
+        oldest = bucket - self.size + 1
+        live = [slot for slot in range(self.size) if self.ids[slot] >= oldest]
+        ports = set()
+        for slot in live:
+            if self.ports[slot]:
+                ports.update(self.ports[slot])
+        return sum(self.syn[slot] for slot in live), len(ports)
+
+
+# (source, microseconds since midnight, destination port) of one SYN
+SynEvent = Tuple[str, int, Optional[int]]
+
+
+class ChunkEdges:
+    """SYNs near both ends of a capture chunk analysed on its own.
+
+    The windows of a SYN less than margin seconds after the chunk's first
+    one may reach into the previous chunk, so its patterns are left to the
+    parent, which replays these head SYNs in file order. The tail (SYNs
+    within margin of the latest) rebuilds the window state the next
+    chunk's head is evaluated against.
+    """
+
+    __slots__ = ('margin', 'first', 'head', 'tail')
+
+    def __init__(self, margin: int):
+        self.margin = margin
+        self.first: Optional[int] = None
+        self.head: List[SynEvent] = []
+        self.tail: Deque[Tuple[int, SynEvent]] = deque()
+
+    def record(self, seconds: int, event: SynEvent) -> bool:
+        """Keep a SYN if it lies near an edge; True when its patterns belong to the parent"""
+        if self.first is None:
+            self.first = seconds
+        if seconds < self.first + self.margin:
+            self.head.append(event)
+            return True
+        tail = self.tail
+        tail.append((seconds, event))
+        while tail[0][0] <= seconds - self.margin:
+            tail.popleft()
+        return False
+
+
+class WindowedDetector:
+    """Per-source short/long sliding windows producing rate-based patterns"""
+
+    def __init__(self, config: Optional[DetectionConfig] = None):
+        self.config = config or DetectionConfig()
+        self.sources: 'OrderedDict[str, tuple]' = OrderedDict()
+        self.latest = 0
+        # Capture time stood in for by wall-clock time while a tailed capture is idle
+        self.idle_until = 0
+        self._clock = CaptureClock()
+        # Set when analysing one chunk of a capture split across workers
+        self.edges: Optional[ChunkEdges] = None
+
+    @property
+    def margin(self) -> int:
+        """Seconds a SYN can stay in a window, partial bucket included"""
+        long = self.config.long
+        return long.seconds + long.bucket_seconds
+
+    def _seconds(self, micros: int) -> int:
+        return self._clock(micros) // 1_000_000
+
+    def add(self, source: str, micros: int, port: Optional[int]) -> List[str]:
+        """Record a SYN and return the patterns the source currently matches"""
+        seconds = self._seconds(micros)
+        self.latest = max(self.latest, seconds)
+        # A record arrived: capture time is moving again
+        self.idle_until = 0
+
+        windows = self.sources.get(source)
+        if windows is None:
+            windows = (RingWindow(self.config.short), RingWindow(self.config.long))
+            self.sources[source] = windows
+            if len(self.sources) > self.config.max_sources:
+                self.sources.popitem(last=False)
+        else:
+            self.sources.move_to_end(source)
+
+        short, long = windows
+        short.add(seconds, port)
+        long.add(seconds, port)
+        if self.edges is not None and self.edges.record(seconds, (source, micros, port)):
+            return []
+        return self._patterns(short.distinct_ports, short.rate, long.distinct_ports)
+
+    def replay(self, edges: ChunkEdges) -> Dict[str, set]:
+        """Fold in the edges of the next chunk; returns the patterns of its head SYNs.
+
+        Tail SYNs only rebuild the window state: the chunk already saw
+        their whole windows.
+        """
+        patterns: Dict[str, set] = {}
+        for source, micros, port in edges.head:
+            found = self.add(source, micros, port)
+            if found:
+                patterns.setdefault(source, set()).update(found)
+        for _, (source, micros, port) in edges.tail:
+            self.add(source, micros, port)
+        return patterns
+
+    def _patterns(self, short_ports: int, short_rate: float, long_ports: int) -> List[str]:
+        config = self.config
+        patterns = []
+        if short_ports >= config.burst_ports:
+            patterns.append(BURST_SCAN)
+        elif long_ports >= config.slow_ports:
+            patterns.append(SLOW_SCAN)
+        if short_rate >= config.flood_syn_rate and short_ports <= config.flood_max_ports:
+            patterns.append(SYN_FLOOD)
+        return patterns
+
+    def expire_idle(self, since: int, idle: float):
+        """Report the windows as if idle seconds had passed since capture time since.
+
+        A tailed capture that goes quiet no longer moves capture time, so
+        wall-clock time stands in for it and stale alerts age out. Only the
+        snapshot view moves: records tcpdump delivers late still land in
+        their own buckets.
+        """
+        self.idle_until = max(self.idle_until, since + int(idle))
+
+    def snapshot(self) -> Dict[str, WindowStats]:
+        """Current window statistics of every source still active in the long window"""
+        now = max(self.latest, self.idle_until)
+        stats = {}
+        for source in list(self.sources):
+            short, long = self.sources[source]
+            short.advance(self.latest)
+            long.advance(self.latest)
+            if not long.syn_total:
+                del self.sources[source]
+                continue
+            short_syn, short_ports = short.view(now)
+            long_syn, long_ports = long.view(now)
+            if not long_syn:
+                continue
+            short_rate = short_syn / (short.bucket_seconds * short.size)
+            stats[source] = WindowStats(
+                short_syn=short_syn,
+                short_rate=short_rate,
+                short_ports=short_ports,
+                long_syn=long_syn,
+                long_ports=long_ports,
+                patterns=self._patterns(short_ports, short_rate, long_ports)
+            )
+        return stats